@@ -0,0 +1,78 @@
+"""
+Latency of the chatbot's semantic scoring at growing index sizes.
+
+Builds a VectorIndex of random 384-dim vectors for each size and times
+search() (one matrix-vector product + argpartition top-k) over a set of
+random queries; sizes up to --baseline-max also time the per-document
+pure-Python cosine loop it replaced, for comparison.
+
+Run: python -m apps.chatbot.benchmarks.semantic_search_bench [--sizes 1000,100000,1000000] [--queries 50] [--k 3]
+"""
+
+import argparse
+import math
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from apps.chatbot.vector_index import VectorIndex
+
+DIMENSIONS = 384
+
+
+def python_cosine_top_k(query, vectors, k):
+    """The old _semantic_search: cosine per document in Python, then a full sort."""
+    scores = []
+    for row, vector in enumerate(vectors):
+        dot = sum(a * b for a, b in zip(query, vector))
+        mag1 = math.sqrt(sum(a * a for a in query))
+        mag2 = math.sqrt(sum(b * b for b in vector))
+        scores.append((dot / (mag1 * mag2) if mag1 and mag2 else 0.0, row))
+    scores.sort(reverse=True)
+    return [row for _, row in scores[:k]]
+
+
+def time_ms(func, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--baseline-max", type=int, default=10000, help="largest size the Python loop is timed at")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, DIMENSIONS), dtype=np.float32)
+
+    print(f"{'docs':>10}{'build s':>10}{'MB':>8}{'p50 ms':>10}{'max ms':>10}{'python p50 ms':>16}")
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        vectors = rng.standard_normal((size, DIMENSIONS), dtype=np.float32)
+        start = time.perf_counter()
+        index = VectorIndex(vectors, range(size))
+        build = time.perf_counter() - start
+        p50, worst = time_ms(lambda q: index.search(q, args.k), queries)
+
+        baseline = ""
+        if size <= args.baseline_max:
+            rows = vectors.tolist()
+            sample = [q.tolist() for q in queries[:5]]
+            assert python_cosine_top_k(sample[0], rows, args.k) == [row for row, _ in index.search(queries[0], args.k)]
+            baseline = f"{time_ms(lambda q: python_cosine_top_k(q, rows, args.k), sample)[0]:.2f}"
+
+        print(f"{size:>10}{build:>10.2f}{index.matrix.nbytes / 2**20:>8.0f}{p50:>10.2f}{worst:>10.2f}{baseline:>16}")
+        del vectors, index
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -509,6 +509,12 @@ from datetime import datetime
 import psycopg
 from decouple import config
 
+from apps.chatbot.vector_index import VectorIndex
+
+# "memory": articles + BM25 + vector index held in this process (latest 1000)
+# "sql": both search legs run in Postgres over the whole archive (sql_retrieval.py)
+RETRIEVAL_MODE = config("CHATBOT_RETRIEVAL", default="memory").lower()
+
 # REMOVE these from top - will load lazily:
 # from rank_bm25 import BM25Okapi
 # from langchain_groq import ChatGroq
@@ -517,6 +523,46 @@ from decouple import config
 # from langchain_huggingface import HuggingFaceEmbeddings
 
 
+def _fmt_date(dt):
+    try:
+        if isinstance(dt, str):
+            return datetime.fromisoformat(dt.replace("Z", "+00:00")).strftime("%Y-%m-%d")
+        return dt.strftime("%Y-%m-%d") if dt else "N/A"
+    except:
+        return "N/A"
+
+
+def article_document(article_id, title, text, category, source, url, published_at):
+    """The Document the prompt is built from, for one scraper_article row"""
+    from langchain_core.documents import Document  # Import here
+
+    article_id = str(article_id)
+    title = (title or "").strip()
+    text = (text or "").strip()
+    category = (category or "general").strip()
+    source = (source or "Unknown").strip()
+    url = (url or "").strip()
+
+    content = (
+        f"Title: {title}\n"
+        f"Category: {category}\n"
+        f"Date: {_fmt_date(published_at)}\n"
+        f"Source: {source}\n"
+        f"Content: {text}"
+    )
+    return Document(
+        page_content=content,
+        metadata={
+            "id": article_id,
+            "title": title,
+            "category": category,
+            "date": _fmt_date(published_at),
+            "source": source,
+            "url": url,
+        }
+    )
+
+
 class LumenNewsRAG:
     """
     Simplified RAG Chatbot with LAZY LOADING
@@ -540,7 +586,8 @@ class LumenNewsRAG:
         self.embeddings = None
         self.bm25 = None
         self.documents: List = []  # Changed from List[Document]
-        self.embedding_cache: Dict[str, List[float]] = {}
+        # Scraper embeddings of self.documents, as one normalized float32 matrix
+        self.vector_index: Optional[VectorIndex] = None
         
         # Don't call _setup() here - it will be called lazily
 
@@ -560,22 +607,20 @@ class LumenNewsRAG:
         print("🔄 Initializing chatbot (lazy loading)...")
         
         # Import HERE, not at module level
-        from langchain_huggingface import HuggingFaceEmbeddings
+        from apps.scraper.utils import embeddings
         
-        # Embeddings model
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True},
-        )
+        # Shared embedder: the embedding service, or one in-process model
+        self.embeddings = embeddings
 
-        # Load articles
-        self.documents = self._load_news_from_database()
+        # SQL retrieval keeps nothing in memory: every search goes to Postgres
+        if RETRIEVAL_MODE != "sql":
+            # Load articles
+            self.documents = self._load_news_from_database()
 
-        # Initialize BM25
-        self._initialize_bm25()
+            # Initialize BM25
+            self._initialize_bm25()
         
-        print("✅ Chatbot initialized!")
+        print(f"✅ Chatbot initialized! (retrieval: {RETRIEVAL_MODE})")
 
     def _ensure_llm(self):
         """Lazy load LLM"""
@@ -595,10 +640,11 @@ class LumenNewsRAG:
 
     def _load_news_from_database(self) -> List:
         """Load articles - imports Document lazily"""
-        from langchain_core.documents import Document  # Import here
-        
+        from pgvector.psycopg import register_vector  # vector columns as numpy arrays
+
         try:
             conn = psycopg.connect(self.pg_connection)
+            register_vector(conn)
             cur = conn.cursor()
 
             cur.execute("SELECT COUNT(*) FROM scraper_article;")
@@ -615,6 +661,7 @@ class LumenNewsRAG:
                 FROM scraper_article a
                 LEFT JOIN scraper_articleembedding e ON a.id = e.article_id
                 WHERE a.text IS NOT NULL AND a.text <> ''
+                  AND a.duplicate_of_id IS NULL
                 ORDER BY a.published_at DESC NULLS LAST
                 LIMIT 1000;
             """
@@ -623,57 +670,23 @@ class LumenNewsRAG:
             rows = cur.fetchall()
 
             docs: List = []
+            vectors, vector_rows = [], []
             for row in rows:
-                article_id = str(row[0])
-                title = (row[1] or "").strip()
-                text = (row[2] or "").strip()
-                category = (row[3] or "general").strip()
-                source = (row[4] or "Unknown").strip()
-                url = (row[5] or "").strip()
-                published_at = row[6]
-                scraped_at = row[7]
                 embedding = row[8]
+                if embedding is not None:
+                    if len(embedding) == 384:
+                        vectors.append(embedding)
+                        vector_rows.append(len(docs))
+                    else:
+                        print(f"⚠️ Invalid embedding for article {row[0]}: {len(embedding)} dims")
 
-                if embedding:
-                    try:
-                        self.embedding_cache[article_id] = [float(x) for x in embedding]
-                    except (ValueError, TypeError) as e:
-                        print(f"⚠️ Invalid embedding for article {article_id}: {e}")
-
-                def fmt_date(dt):
-                    try:
-                        if isinstance(dt, str):
-                            return datetime.fromisoformat(dt.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                        return dt.strftime("%Y-%m-%d") if dt else "N/A"
-                    except:
-                        return "N/A"
-
-                content = (
-                    f"Title: {title}\n"
-                    f"Category: {category}\n"
-                    f"Date: {fmt_date(published_at)}\n"
-                    f"Source: {source}\n"
-                    f"Content: {text}"
-                )
-
-                docs.append(
-                    Document(
-                        page_content=content,
-                        metadata={
-                            "id": article_id,
-                            "title": title,
-                            "category": category,
-                            "date": fmt_date(published_at),
-                            "source": source,
-                            "url": url,
-                        }
-                    )
-                )
+                docs.append(article_document(*row[:7]))
 
             cur.close()
             conn.close()
 
-            print(f"✅ Loaded {len(docs)} articles ({len(self.embedding_cache)} with embeddings)")
+            self.vector_index = VectorIndex(vectors, vector_rows)
+            print(f"✅ Loaded {len(docs)} articles ({len(self.vector_index)} with embeddings)")
             return docs
 
         except Exception as e:
@@ -690,41 +703,23 @@ class LumenNewsRAG:
         tokenized = [d.page_content.lower().split() for d in self.documents]
         self.bm25 = BM25Okapi(tokenized)
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        import math
-        
-        try:
-            vec1 = [float(x) for x in vec1]
-            vec2 = [float(x) for x in vec2]
-        except (ValueError, TypeError):
-            return 0.0
-        
-        if len(vec1) != len(vec2):
-            return 0.0
-        
-        dot = sum(a * b for a, b in zip(vec1, vec2))
-        mag1 = math.sqrt(sum(a * a for a in vec1))
-        mag2 = math.sqrt(sum(b * b for b in vec2))
-        return dot / (mag1 * mag2) if mag1 and mag2 else 0.0
-
     def _semantic_search(self, query: str, k: int = 3) -> List:
-        if not self.embedding_cache:
+        if not self.vector_index:
             return []
 
-        query_vector = self.embeddings.embed_query(query)
-
-        scores = []
-        for doc in self.documents:
-            doc_id = doc.metadata.get("id")
-            if doc_id in self.embedding_cache:
-                article_vector = self.embedding_cache[doc_id]
-                similarity = self._cosine_similarity(query_vector, article_vector)
-                scores.append((similarity, doc))
+        # Encoded like the stored vectors: the active embedding version, not always MiniLM
+        from apps.scraper.embedding_versions import encode_query
+        query_vector = encode_query(query)
+        if query_vector is None:
+            return []
 
-        scores.sort(reverse=True)
-        return [doc for _, doc in scores[:k]]
+        return [self.documents[row] for row, _ in self.vector_index.search(query_vector, k)]
 
     def _hybrid_search(self, query: str, k: int = 3) -> List:
+        if RETRIEVAL_MODE == "sql":
+            from apps.chatbot import sql_retrieval
+            return [article_document(*row) for row in sql_retrieval.hybrid_search(query, k=k)]
+
         results = []
         seen = set()
 
@@ -766,6 +761,10 @@ class LumenNewsRAG:
         return None
 
     def _latest_by_category(self, category: str, limit: int = 3) -> List:
+        if RETRIEVAL_MODE == "sql":
+            from apps.chatbot import sql_retrieval
+            return [article_document(*row) for row in sql_retrieval.latest_by_category(category, limit)]
+
         subset = [d for d in self.documents if (d.metadata.get("category") or "").lower() == category.lower()]
 
         def parse_date(s):
@@ -788,7 +787,7 @@ class LumenNewsRAG:
 
         q = user_question.strip()
 
-        if not self.documents:
+        if not self._has_articles():
             return {
                 "success": True,
                 "response": "No articles in database yet. Please run the scraper first!",
@@ -858,9 +857,18 @@ Available news articles:
             "sources": sources,
         }
 
+    def _has_articles(self) -> bool:
+        if RETRIEVAL_MODE == "sql":
+            from apps.chatbot import sql_retrieval
+            return sql_retrieval.article_count() > 0
+        return bool(self.documents)
+
     def refresh_articles(self):
         """Reload articles"""
         self._ensure_setup()
+        if RETRIEVAL_MODE == "sql":
+            from apps.chatbot import sql_retrieval
+            return sql_retrieval.article_count()  # always current, nothing to reload
         self.documents = self._load_news_from_database()
         self._initialize_bm25()
         return len(self.documents)
@@ -921,6 +929,17 @@ Available news articles:
     def get_stats(self) -> Dict:
         """Get statistics - ensures setup first"""
         self._ensure_setup()
+
+        if RETRIEVAL_MODE == "sql":
+            from apps.chatbot import sql_retrieval
+            total = sql_retrieval.article_count()
+            return {
+                "total_articles": total,
+                "articles_with_embeddings": sql_retrieval.embedded_count(),
+                "categories": sql_retrieval.category_counts(),
+                "model": self.groq_model,
+                "status": "active" if total else "empty",
+            }
         
         categories = {}
         for d in self.documents:
@@ -929,7 +948,7 @@ Available news articles:
 
         return {
             "total_articles": len(self.documents),
-            "articles_with_embeddings": len(self.embedding_cache),
+            "articles_with_embeddings": len(self.vector_index) if self.vector_index else 0,
             "categories": categories,
             "model": self.groq_model,
             "status": "active" if self.documents else "empty",
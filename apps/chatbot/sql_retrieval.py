@@ -0,0 +1,113 @@
+"""
+Chatbot retrieval inside Postgres (CHATBOT_RETRIEVAL=sql).
+
+Both legs of the hybrid search run over the whole archive, as one
+statement: the semantic leg takes the CANDIDATES nearest article
+embeddings (HNSW index), the keyword leg the CANDIDATES best
+websearch_to_tsquery matches of Article.search_vector (a stored tsvector,
+GIN-indexed, so ranking doesn't re-parse the text), and the legs are fused
+with Reciprocal Rank Fusion server-side, so only the final k rows come back.
+"""
+
+from typing import List, Optional, Tuple
+
+from decouple import config
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Count, F
+from pgvector.django import CosineDistance
+
+from apps.scraper.embedding_versions import encode_query
+from apps.scraper.models import Article, ArticleEmbedding
+from apps.scraper.vector_search import ann_settings
+
+# Rows each leg contributes to the fusion
+CANDIDATES = int(config("CHATBOT_SQL_CANDIDATES", default="50"))
+# RRF damping constant: score = sum over legs of 1 / (RRF_K + rank)
+RRF_K = 60
+
+# Columns article_document() is built from
+ARTICLE_COLUMNS = ("id", "title", "text", "category", "source", "url", "published_at")
+
+
+def _semantic_leg(query_vector, n):
+    return (
+        ArticleEmbedding.objects.filter(article__duplicate_of__isnull=True)
+        .exclude(article__text="")
+        .annotate(distance=CosineDistance("embedding", query_vector))
+        .order_by("distance")
+        .values("article_id", "distance")[:n]
+    )
+
+
+def _keyword_leg(query, n):
+    search_query = SearchQuery(query, config="english", search_type="websearch")
+    return (
+        Article.objects.filter(duplicate_of__isnull=True, search_vector=search_query)
+        .annotate(rank=SearchRank(F("search_vector"), search_query))
+        .order_by("-rank")
+        .values("id", "rank")[:n]
+    )
+
+
+def hybrid_search(query: str, k: int = 3, candidates: Optional[int] = None) -> List[Tuple]:
+    """
+    Article rows (ARTICLE_COLUMNS) best matching query by RRF of the
+    semantic and keyword legs; keyword-only if the query can't be embedded.
+    """
+    candidates = max(candidates or CANDIDATES, k)
+    legs, params = [], []
+
+    query_vector = encode_query(query)
+    if query_vector is not None:
+        sql, leg_params = _semantic_leg(query_vector, candidates).query.sql_with_params()
+        legs.append(f"SELECT article_id AS id, row_number() OVER (ORDER BY distance) AS position FROM ({sql}) semantic")
+        params.extend(leg_params)
+
+    sql, leg_params = _keyword_leg(query, candidates).query.sql_with_params()
+    legs.append(f"SELECT id, row_number() OVER (ORDER BY rank DESC) AS position FROM ({sql}) keyword")
+    params.extend(leg_params)
+
+    columns = ", ".join(f"a.{column}" for column in ARTICLE_COLUMNS)
+    fused = f"""
+        SELECT {columns}
+        FROM (
+            SELECT id, SUM(1.0 / (%s + position)) AS score
+            FROM ({" UNION ALL ".join(legs)}) legs
+            GROUP BY id
+            ORDER BY score DESC
+            LIMIT %s
+        ) fused
+        JOIN {Article._meta.db_table} a ON a.id = fused.id
+        ORDER BY fused.score DESC
+    """
+    with ann_settings(ef_search=candidates), connection.cursor() as cursor:
+        cursor.execute(fused, [RRF_K, *params, k])
+        return cursor.fetchall()
+
+
+def latest_by_category(category: str, limit: int = 3) -> List[Tuple]:
+    return list(
+        Article.objects.filter(duplicate_of__isnull=True, category__iexact=category)
+        .exclude(text="")
+        .order_by(F("published_at").desc(nulls_last=True))
+        .values_list(*ARTICLE_COLUMNS)[:limit]
+    )
+
+
+def article_count() -> int:
+    return Article.objects.filter(duplicate_of__isnull=True).exclude(text="").count()
+
+
+def embedded_count() -> int:
+    return ArticleEmbedding.objects.filter(article__duplicate_of__isnull=True).count()
+
+
+def category_counts() -> dict:
+    rows = (
+        Article.objects.filter(duplicate_of__isnull=True)
+        .exclude(text="")
+        .values_list("category")
+        .annotate(n=Count("id"))
+    )
+    return {(category or "general"): n for category, n in rows}
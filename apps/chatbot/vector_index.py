@@ -0,0 +1,43 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class VectorIndex:
+    """
+    In-memory cosine index: one contiguous float32 matrix of L2-normalized
+    vectors, so scoring a query is a single matrix-vector product.
+    rows[i] is what row i of the matrix stands for (e.g. a document index).
+    """
+
+    def __init__(self, vectors, rows: Sequence[int], dimensions: int = 384):
+        matrix = np.array(vectors, dtype=np.float32).reshape(-1, dimensions)  # our own copy
+        rows = np.asarray(rows, dtype=np.int64)
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))  # no n x d temporary
+        keep = norms > 0  # zero vectors have no direction to compare
+        if not keep.all():
+            matrix, rows, norms = matrix[keep], rows[keep], norms[keep]
+        matrix /= norms[:, None]
+        self.matrix = matrix
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, query, k: int = 3) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the k best matches, best first."""
+        if not len(self.rows) or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if query.shape[0] != self.matrix.shape[1] or not norm:
+            return []
+
+        scores = self.matrix @ (query / norm)
+        if k < len(scores):
+            # Top k in O(n), then only those k get sorted
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(self.rows[i]), float(scores[i])) for i in top]
@@ -1,7 +1,7 @@
 # apps/debate/tools/search_tool.py
 from crewai.tools import tool
-import requests
 from decouple import config
+from apps.scraper.utils import http_client
 import os
 
 os.environ["SERPER_API_KEY"] = config('SERPER_API_KEY')
@@ -30,7 +30,7 @@ def web_search_tool(query: str) -> str:
             "Content-Type": "application/json"
         }
         
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_client.post(url, json=payload, headers=headers)
         response.raise_for_status()
         
         results = response.json()
@@ -56,7 +56,7 @@ def recommendation(request):
 
     # Fallback: latest 10 articles
     if not recommendations:
-        latest_articles = Article.objects.order_by('-published_at')[:]
+        latest_articles = Article.objects.filter(duplicate_of__isnull=True).order_by('-published_at')[:]
         recommendations = [
             {
                 "id": a.id,
@@ -78,7 +78,8 @@ def latest_feed(request):
     """Display latest articles feed based on published date"""
     # ---- ONLY ARTICLES THAT HAVE A published_at value ----
     latest_articles = Article.objects.filter(
-        published_at__isnull=False          # <-- THIS LINE
+        published_at__isnull=False,          # <-- THIS LINE
+        duplicate_of__isnull=True,           # one card per story, not per wire copy
     ).order_by('-published_at')[:]
 
     # Format articles as dictionaries
@@ -137,6 +138,7 @@ import torch
 import shap
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from apps.scraper.utils.batching import map_batched, token_lengths
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
@@ -277,11 +279,18 @@ def generate_shap_explanation(text, pred_idx, top_k=3):
             texts = [t for t in texts if t.strip()]
             if not texts:
                 raise ValueError("No valid text")
-            enc = sentiment_tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
-            enc = {k: v.to(device) for k, v in enc.items()}
-            with torch.no_grad():
-                probs = torch.nn.functional.softmax(sentiment_model(**enc).logits, dim=-1)
-            return probs.cpu().numpy()
+
+            # SHAP sends hundreds of masked variants of very different lengths:
+            # run them in length buckets instead of padding all to the longest
+            def run_batch(batch):
+                enc = sentiment_tokenizer(batch, return_tensors="pt", truncation=True, padding=True, max_length=512)
+                enc = {k: v.to(device) for k, v in enc.items()}
+                with torch.no_grad():
+                    probs = torch.nn.functional.softmax(sentiment_model(**enc).logits, dim=-1)
+                return probs.cpu().numpy()
+
+            lengths = token_lengths(sentiment_tokenizer, texts, max_length=512)
+            return np.stack(map_batched(run_batch, texts, lengths))
 
         masker = shap.maskers.Text(sentiment_tokenizer)
         explainer = shap.Explainer(predict_proba, masker)
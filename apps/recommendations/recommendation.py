@@ -1,17 +1,9 @@
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-from transformers import AutoTokenizer, AutoModel
-import torch
 from datetime import datetime
 from apps.users.models import UserPreference
 from apps.scraper.models import Article, ArticleEmbedding
-
-
-# Load model once at import
-DEVICE = "cpu"
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME).to(DEVICE)
+from apps.scraper.utils.embeddings import get_embedding, get_embedding_batch
 
 
 def get_user_embedding(user_pref):
@@ -23,14 +15,8 @@ def get_user_embedding(user_pref):
     if not articles.exists():
         articles = Article.objects.all()[:5]
 
-    embeddings = []
-    for article in articles:
-        text = article.text[:1000]
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512).to(DEVICE)
-        with torch.no_grad():
-            outputs = model(**inputs)
-            emb = outputs.last_hidden_state.mean(dim=1).squeeze().cpu().numpy()
-        embeddings.append(emb)
+    # One batched call to the shared embedder instead of one forward pass per article
+    embeddings = get_embedding_batch([article.text[:1000] for article in articles])
 
     if not embeddings:
         return np.zeros(384)
@@ -66,8 +52,8 @@ def generate_recommendations_for_user(user_id, top_n=20):
     mental_state = user_pref.mental_state or "neutral"
     min_sentiment = user_pref.min_sentiment or 0.5
 
-    # Load articles
-    articles = Article.objects.all()
+    # Load articles (near-duplicate copies of a story are ranked through their original)
+    articles = Article.objects.filter(duplicate_of__isnull=True)
 
     # Get user embedding (from DB or compute fallback)
     if user_pref.embedding is not None:
@@ -88,11 +74,10 @@ def generate_recommendations_for_user(user_id, top_n=20):
         if article_embedding is not None:
             article_emb = np.array(article_embedding, dtype=float)
         else:
-            text = article.text[:1000]
-            inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512).to(DEVICE)
-            with torch.no_grad():
-                outputs = model(**inputs)
-                article_emb = outputs.last_hidden_state.mean(dim=1).squeeze().cpu().numpy()
+            article_embedding = get_embedding(article.text[:1000])
+            if article_embedding is None:
+                continue
+            article_emb = np.array(article_embedding, dtype=float)
 
         # Similarity
         emb_sim = cosine_similarity([user_embedding], [article_emb])[0][0]
@@ -0,0 +1,149 @@
+"""
+Recall/latency report for the ArticleEmbedding ANN index.
+
+Samples stored embeddings as queries, takes the exact nearest neighbours
+(sequential scan) as ground truth, then runs the same queries through the
+index for each search mode (fp32, halfvec, binary + re-rank) and
+hnsw.ef_search (or ivfflat.probes) value and prints recall@k with p50/p95
+latency, plus the on-disk size of every embedding index.
+
+Run: python -m apps.scraper.benchmarks.ann_bench [--queries 100] [--k 10]
+         [--ef-search 20,40,100] [--modes fp32,halfvec,binary] [--rerank 4]
+         [--ivfflat --lists N --probes 1,10,30]
+
+The halfvec/binary indexes a run needs are built for it and dropped
+afterwards unless --keep-compact. --ivfflat builds the IVFFlat index the
+same way (--keep-ivfflat); its probes are measured with the HNSW index
+still in place, so the planner may choose either.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from apps.scraper.models import ArticleEmbedding  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from apps.scraper.vector_search import (  # noqa: E402
+    SEARCH_MODES,
+    compact_index_exists,
+    create_compact_index,
+    create_ivfflat_index,
+    drop_compact_index,
+    drop_ivfflat_index,
+    nearest_embeddings,
+)
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def mode_list(value):
+    modes = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = set(modes) - set(SEARCH_MODES)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown modes {sorted(unknown)}, expected {SEARCH_MODES}")
+    return modes
+
+
+def index_sizes():
+    """(index name, bytes) of every index on the embeddings table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes "
+            "WHERE relname = %s ORDER BY indexrelname",
+            [ArticleEmbedding._meta.db_table],
+        )
+        return cursor.fetchall()
+
+
+def sample_queries(n):
+    return list(ArticleEmbedding.objects.order_by("?").values_list("embedding", flat=True)[:n])
+
+
+def run(queries, k, **settings):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = nearest_embeddings(query, k=k, **settings)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append({row.article_id for row in rows})
+    return results, timings
+
+
+def report(label, truth, results, timings, k):
+    recall = statistics.mean(len(t & r) / max(1, min(k, len(t))) for t, r in zip(truth, results))
+    p50 = statistics.median(timings)
+    p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+    print(f"{label:<22}{recall:>10.3f}{p50:>10.2f}{p95:>10.2f}")
+
+
+def print_index_sizes():
+    print(f"\n{'index':<36}{'size MB':>10}")
+    for name, size in index_sizes():
+        print(f"{name:<36}{size / 2**20:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int_list, default=[20, 40, 100])
+    parser.add_argument("--modes", type=mode_list, default=list(SEARCH_MODES))
+    parser.add_argument("--rerank", type=int, default=None, help="candidates per result for halfvec/binary")
+    parser.add_argument("--keep-compact", action="store_true", help="keep the halfvec/binary indexes built for the run")
+    parser.add_argument("--ivfflat", action="store_true", help="also measure an IVFFlat index")
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int_list, default=[1, 10, 30])
+    parser.add_argument("--keep-ivfflat", action="store_true")
+    args = parser.parse_args()
+
+    queries = sample_queries(args.queries)
+    if not queries:
+        print("❌ No embeddings to query")
+        return 1
+    print(f"{ArticleEmbedding.objects.count()} embeddings, {len(queries)} queries, k={args.k}\n")
+
+    truth, timings = run(queries, args.k, exact=True)
+    print(f"{'mode':<22}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    report("exact (seq scan)", truth, truth, timings, args.k)
+
+    built = [mode for mode in args.modes if mode != "fp32" and not compact_index_exists(mode)]
+    try:
+        for mode in built:
+            create_compact_index(mode)
+        for mode in args.modes:
+            for ef in args.ef_search:
+                results, timings = run(queries, args.k, ef_search=ef, mode=mode, rerank=args.rerank)
+                report(f"{mode} ef={ef}", truth, results, timings, args.k)
+
+        if not args.ivfflat:
+            print_index_sizes()
+            return 0
+
+        lists = create_ivfflat_index(args.lists)
+        try:
+            for probes in args.probes:
+                results, timings = run(queries, args.k, probes=probes, mode="fp32")
+                report(f"ivfflat {lists}/{probes}", truth, results, timings, args.k)
+            print_index_sizes()
+        finally:
+            if not args.keep_ivfflat:
+                drop_ivfflat_index()
+        return 0
+    finally:
+        if not args.keep_compact:
+            for mode in built:
+                drop_compact_index(mode)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Parity check + micro-benchmark for apps.scraper.utils.cleaner.clean_text.
+
+Compares the fast path against the original BeautifulSoup cleaner over a
+corpus of recorded feed snippets, then times both.
+
+Run: python -m apps.scraper.benchmarks.cleaner_bench [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from apps.scraper.utils.cleaner import _normalize, _soup_text, clean_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CORPUS_PATH = os.path.join(FIXTURES_DIR, "feed_snippets.jsonl")
+
+
+def reference_clean_text(text):
+    """The cleaner as it was before the fast path: always a full soup."""
+    return _normalize(_soup_text(text))
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+
+def check_parity(corpus):
+    mismatches = []
+    for text in corpus:
+        expected = reference_clean_text(text)
+        actual = clean_text(text)
+        if actual != expected:
+            mismatches.append((text, expected, actual))
+    return mismatches
+
+
+def bench(func, corpus, repeat):
+    seconds = timeit.timeit(lambda: [func(text) for text in corpus], number=repeat)
+    return seconds / (repeat * len(corpus)) * 1e6  # µs per snippet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+
+    mismatches = check_parity(corpus)
+    for text, expected, actual in mismatches:
+        print(f"❌ MISMATCH for {text[:60]!r}\n   expected: {expected[:80]!r}\n   actual:   {actual[:80]!r}")
+    print(f"Parity: {len(corpus) - len(mismatches)}/{len(corpus)} snippets identical")
+
+    plain = [text for text in corpus if "<" not in text]
+    markup = [text for text in corpus if "<" in text]
+    print(f"{'corpus':<10}{'n':>5}{'soup µs':>12}{'fast µs':>12}{'speedup':>10}")
+    for name, subset in (("all", corpus), ("plain", plain), ("markup", markup)):
+        if not subset:
+            continue
+        slow = bench(reference_clean_text, subset, args.repeat)
+        fast = bench(clean_text, subset, args.repeat)
+        print(f"{name:<10}{len(subset):>5}{slow:>12.1f}{fast:>12.1f}{slow / fast:>9.1f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Throughput + round-trip check of `manage.py embeddings` (binary COPY).
+
+Runs on a throwaway test database (test_<NAME>, created, migrated and
+destroyed by the run), never the configured one. Stores --rows articles
+with random vectors, then for both import paths:
+
+    export DIR  -> wipe ArticleEmbedding -> import DIR
+    FILE.jsonl  -> wipe ArticleEmbedding -> import FILE.jsonl
+
+reports rows/sec and checks every vector came back bit for bit.
+
+Run: python -m apps.scraper.benchmarks.embeddings_bench [--rows 20000] [--chunk-size 5000]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import django
+import numpy as np
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models.signals import pre_migrate  # noqa: E402
+
+from apps.scraper.embedding_versions import current_version  # noqa: E402
+from apps.scraper.models import Article, ArticleEmbedding  # noqa: E402
+
+
+def create_vector_extension(using, **kwargs):
+    # The test database is cloned from template1, which has no pgvector
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+
+def populate(rows, dimensions):
+    Article.objects.bulk_create(
+        [Article(title=f"Article {i}", url=f"https://bench.example/{i}") for i in range(rows)],
+        batch_size=5000,
+    )
+    version = current_version().name
+    vectors = np.random.default_rng(0).standard_normal((rows, dimensions), dtype=np.float32)
+    ids = Article.objects.order_by("id").values_list("id", flat=True)
+    ArticleEmbedding.objects.bulk_create(
+        [ArticleEmbedding(article_id=i, embedding=v, model_version=version) for i, v in zip(ids, vectors)],
+        batch_size=5000,
+    )
+
+
+def stored_vectors():
+    return {
+        url: np.asarray(vector, dtype=np.float32)
+        for url, vector in ArticleEmbedding.objects.values_list("article__url", "embedding")
+    }
+
+
+def same_vectors(expected, actual):
+    return expected.keys() == actual.keys() and all(np.array_equal(expected[url], actual[url]) for url in expected)
+
+
+def timed(*args, **options):
+    start = time.perf_counter()
+    call_command("embeddings", *args, stdout=io.StringIO(), **options)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    pre_migrate.connect(create_vector_extension)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        populate(args.rows, ArticleEmbedding._meta.get_field("embedding").dimensions)
+        expected = stored_vectors()
+
+        with tempfile.TemporaryDirectory() as directory:
+            export_dir = os.path.join(directory, "export")
+            jsonl_path = os.path.join(directory, "embeddings.jsonl")
+            with open(jsonl_path, "w", encoding="utf-8") as f:
+                for url, vector in expected.items():
+                    f.write(json.dumps({"url": url, "embedding": vector.tolist()}) + "\n")
+
+            print(f"{'step':<14}{'rows/sec':>12}   round trip")
+            seconds = timed("export", export_dir, chunk_size=args.chunk_size)
+            print(f"{'export':<14}{args.rows / seconds:>12.0f}")
+
+            passed = True
+            for step, path in (("import parts", export_dir), ("import jsonl", jsonl_path)):
+                ArticleEmbedding.objects.all().delete()
+                seconds = timed("import", path, chunk_size=args.chunk_size)
+                ok = same_vectors(expected, stored_vectors())
+                passed = passed and ok
+                print(f"{step:<14}{args.rows / seconds:>12.0f}   {'✅' if ok else '❌'}")
+        return 0 if passed else 1
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
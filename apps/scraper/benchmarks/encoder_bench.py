@@ -0,0 +1,61 @@
+"""
+Throughput + parity check of the embedding backends.
+
+Encodes the same corpus with the PyTorch fp32 SentenceTransformer and the
+int8 ONNX export (python -m apps.scraper.utils.onnx_encoder must have run),
+then reports texts/sec for both and their agreement, both called with
+encode()'s defaults like the pipeline does.
+
+Run: python -m apps.scraper.benchmarks.encoder_bench [--repeat 5] [--batch-size 32]
+"""
+
+import argparse
+import sys
+import time
+
+from apps.scraper.utils.onnx_encoder import (
+    DEFAULT_CORPUS,
+    ONNX_DIR,
+    OnnxEncoder,
+    compare_vectors,
+    load_corpus,
+)
+
+
+def bench(encoder, corpus, repeat, batch_size):
+    encoder.encode(corpus[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        vectors = encoder.encode(corpus, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    return vectors, repeat * len(corpus) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--onnx-dir", default=ONNX_DIR)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    corpus = load_corpus(args.corpus)
+    torch_vectors, torch_rate = bench(SentenceTransformer("all-MiniLM-L6-v2", device="cpu"), corpus, args.repeat, args.batch_size)
+    onnx_vectors, onnx_rate = bench(OnnxEncoder(args.onnx_dir), corpus, args.repeat, args.batch_size)
+
+    report = compare_vectors(torch_vectors, onnx_vectors)
+
+    print(f"{'backend':<12}{'texts/sec':>12}")
+    print(f"{'torch fp32':<12}{torch_rate:>12.1f}")
+    print(f"{'onnx int8':<12}{onnx_rate:>12.1f}   ({onnx_rate / torch_rate:.1f}x)")
+    print(
+        f"Parity {'✅' if report['passed'] else '❌'}: mean cosine {report['mean_cosine']:.4f}, "
+        f"min {report['min_cosine']:.4f}, length error {report['max_norm_error']:.4f} over {report['texts']} texts"
+    )
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
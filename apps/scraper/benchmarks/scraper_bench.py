@@ -0,0 +1,218 @@
+"""
+Offline scraper benchmark.
+
+Replays recorded RSS XML, NewsAPI JSON and article HTML through the real
+scrape pipeline (fetch -> clean -> dedupe -> persist) by mounting a
+fixture transport on the shared HTTP session - no network is used.
+Reports articles/sec, time spent per stage and peak memory.
+
+Run:
+    python -m apps.scraper.benchmarks.scraper_bench --scale 20 --latency-ms 50
+    python -m apps.scraper.benchmarks.scraper_bench --persist   # also writes to the configured DB
+
+--scale N replays every recorded feed N times under distinct URLs, so the
+run looks like 3*N feeds. --latency-ms simulates the network round trip.
+Stage times are summed over worker threads, so they can exceed wall time;
+"extract" includes the clean_text call the NewsAPI extractor makes.
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+import feedparser  # noqa: E402
+import requests  # noqa: E402
+from requests.adapters import BaseAdapter  # noqa: E402
+
+from apps.scraper import persistence, scraper  # noqa: E402
+from apps.scraper.feed_state import MemoryFeedState  # noqa: E402
+from apps.scraper.utils import api_fetcher, host_guard, http_client  # noqa: E402
+from apps.scraper.utils.html_cache import html_cache  # noqa: E402
+from apps.scraper.utils.simhash import SimHashIndex  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FEED_KEYS = ("bbc", "techcrunch", "wired")
+PAGE_BY_HOST = {
+    "www.bbc.co.uk": "bbc.html",
+    "techcrunch.com": "techcrunch.html",
+    "www.wired.com": "wired.html",
+    "www.reuters.com": "reuters.html",
+}
+FEED_HOST = "feeds.fixture.local"
+
+
+def _read(*parts):
+    with open(os.path.join(FIXTURES_DIR, *parts), "rb") as f:
+        return f.read()
+
+
+class FixtureAdapter(BaseAdapter):
+    """requests transport that answers from the recorded fixtures."""
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.feeds = {key: _read("feeds", f"{key}.xml").decode("utf-8") for key in FEED_KEYS}
+        self.pages = {host: _read("pages", name) for host, name in PAGE_BY_HOST.items()}
+        self.newsapi = json.loads(_read("newsapi", "top-headlines.json"))
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _body(self, request):
+        parts = urlsplit(request.url)
+        if parts.hostname == FEED_HOST:
+            # /r<replica>/<key>.xml: same feed, links and GUIDs made unique per replica
+            match = re.match(r"/r(\d+)/(\w+)\.xml", parts.path)
+            replica, key = match.group(1), match.group(2)
+            xml = self.feeds[key].replace("/2025/10/", f"/2025/10/r{replica}-")
+            xml = re.sub(r"<guid([^>]*)>", rf"<guid\1>r{replica}-", xml)
+            return 200, "application/rss+xml; charset=utf-8", xml.encode("utf-8")
+
+        if parts.path.startswith("/v2/top-headlines"):
+            category = parse_qs(parts.query).get("category", ["general"])[0]
+            payload = json.dumps(self.newsapi).replace("story-", f"{category}-story-")
+            return 200, "application/json", payload.encode("utf-8")
+
+        page = self.pages.get(parts.hostname)
+        if page is None:
+            return 404, "text/plain", b"not recorded"
+        # Recorded pages are per site; give every URL its own lead paragraph so
+        # exact-duplicate removal doesn't collapse the run to one article per site
+        lead = f"<p>Reporting for {parts.path.strip('/')} continues below.</p>".encode("utf-8")
+        return 200, "text/html; charset=utf-8", page.replace(b"<p>", lead + b"<p>", 1)
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+
+        status, content_type, body = self._body(request)
+        response = requests.Response()
+        response.status_code = status
+        response.headers["Content-Type"] = content_type
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class StageTimer:
+    """Accumulates wall time per pipeline stage across worker threads."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.seconds[stage] += elapsed
+                    self.calls[stage] += 1
+        return timed
+
+
+def install_fixtures(scale, latency, host_rate, timer):
+    """Point the scraper at the fixtures and wrap every stage with the timer."""
+    adapter = FixtureAdapter(latency=latency)
+    session = http_client.get_session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    sources = {"bench": [
+        {"source": key, "url": f"https://{FEED_HOST}/r{replica}/{key}.xml"}
+        for replica in range(scale)
+        for key in FEED_KEYS
+    ]}
+    scraper.load_sources = lambda: sources
+    api_fetcher.NEWSAPI_KEY = "fixture"
+    # Every replica shares the four recorded sites, so per-host pacing is opt-in
+    host_guard.rate_limiter.rate = host_rate
+
+    # Fresh, throwaway HTML cache so every run really "downloads"
+    html_cache.root = tempfile.mkdtemp(prefix="lumen-bench-cache-")
+    html_cache._size = None
+
+    feedparser.parse = timer.wrap("feed parse", feedparser.parse)
+    scraper.fetch_html = timer.wrap("download", scraper.fetch_html)
+    api_fetcher.fetch_html = timer.wrap("download", api_fetcher.fetch_html)
+    scraper.extract_article_text = timer.wrap("extract", scraper.extract_article_text)
+    api_fetcher.extract_paragraph_text = timer.wrap("extract", api_fetcher.extract_paragraph_text)
+    scraper.clean_text = timer.wrap("clean", scraper.clean_text)
+    persistence._upsert_batch = timer.wrap("persist", persistence._upsert_batch)
+    return adapter
+
+
+def run(persist, batch_size):
+    if persist:
+        from apps.scraper.pipeline import run_ingest
+        totals = run_ingest(skip_known=False, only_due=False, batch_size=batch_size)
+        return totals["total"]
+
+    stream = scraper.dedupe_articles(
+        scraper.clean_articles(scraper.iter_articles(MemoryFeedState(), skip_known=False)),
+        simhash_index=SimHashIndex(),
+    )
+    return sum(1 for _ in stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="replicas of each recorded feed")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated network latency per request")
+    parser.add_argument("--host-rate", type=float, default=0.0, help="per-host requests/sec (0 = unlimited)")
+    parser.add_argument("--persist", action="store_true", help="write through bulk_upsert_articles (needs the DB)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc peak (slows the run down)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    adapter = install_fixtures(args.scale, args.latency_ms / 1000, args.host_rate, timer)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    articles = run(args.persist, args.batch_size)
+    wall = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+
+    print(f"feeds: {args.scale * len(FEED_KEYS)}  requests: {adapter.requests}  articles: {articles}")
+    print(f"wall: {wall:.2f}s  throughput: {articles / wall:.1f} articles/sec")
+    print(f"{'stage':<12}{'calls':>8}{'total s':>10}{'avg ms':>10}")
+    for stage in ("feed parse", "download", "extract", "clean", "persist"):
+        calls = timer.calls.get(stage, 0)
+        seconds = timer.seconds.get(stage, 0.0)
+        avg = seconds / calls * 1000 if calls else 0.0
+        print(f"{stage:<12}{calls:>8}{seconds:>10.2f}{avg:>10.2f}")
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    print(f"peak RSS: {max_rss:.0f} MB" + (f"  traced peak: {traced_peak / 1024 / 1024:.1f} MB" if traced_peak else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,3 +4,9 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # scraper/
 DATA_DIR = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 JSON_PATH = os.path.join(DATA_DIR, "embeddings.jsonl")
+
+# Fetch engine limits (override through the environment)
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "16"))     # global concurrency cap
+MAX_PER_HOST = int(os.getenv("SCRAPER_MAX_PER_HOST", "4"))     # in-flight requests per host
+FEED_TIMEOUT = float(os.getenv("SCRAPER_FEED_TIMEOUT", "10"))  # seconds per RSS download
+ARTICLE_TIMEOUT = float(os.getenv("SCRAPER_ARTICLE_TIMEOUT", "10"))  # seconds per article page
@@ -0,0 +1,59 @@
+import logging
+import os
+
+import redis
+from celery import current_app
+
+from .utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Ingestion pushes article ids here; embed_pending_articles drains them.
+QUEUE_KEY = "scraper:embed:queue"
+FLUSH_SCHEDULED_KEY = "scraper:embed:flush-scheduled"
+FLUSH_TASK = "apps.scraper.tasks.embed_pending_articles"
+
+# Seconds new ids wait for company, so the encoder sees one big batch
+# instead of one call per scraped batch
+BATCH_WINDOW = float(os.getenv("EMBED_BATCH_WINDOW", "5"))
+MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "256"))
+
+
+def enqueue_embeddings(article_ids):
+    """
+    Queue articles for embedding and make sure a flush runs within
+    BATCH_WINDOW seconds. Never raises: if Redis or the broker is down the
+    periodic generate_embeddings sweep picks the articles up instead.
+    """
+    article_ids = [article_id for article_id in article_ids if article_id]
+    if not article_ids:
+        return
+
+    try:
+        client = get_redis()
+        client.rpush(QUEUE_KEY, *article_ids)
+        # Only the first enqueue of a window schedules the flush
+        if client.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=int(BATCH_WINDOW) + 60):
+            current_app.send_task(FLUSH_TASK, countdown=BATCH_WINDOW)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not queue {len(article_ids)} articles for embedding, leaving them to the sweep: {e}")
+
+
+def pop_batch(max_items=MAX_BATCH):
+    """Take up to max_items queued ids (deduplicated, oldest first)."""
+    pipe = get_redis().pipeline()  # MULTI: read + trim as one step
+    pipe.lrange(QUEUE_KEY, 0, max_items - 1)
+    pipe.ltrim(QUEUE_KEY, max_items, -1)
+    ids, _ = pipe.execute()
+    return list(dict.fromkeys(int(article_id) for article_id in ids))
+
+
+def start_flush():
+    """
+    Called by the flush task before it drains the queue: ids queued from now
+    on schedule the next flush instead of being left for this one.
+    """
+    try:
+        get_redis().delete(FLUSH_SCHEDULED_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Could not reset the embedding flush flag: {e}")
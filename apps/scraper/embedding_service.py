@@ -0,0 +1,203 @@
+"""
+Local embedding service.
+
+Loads all-MiniLM-L6-v2 once and serves it over HTTP to every web and
+worker process (set EMBEDDING_SERVICE_URL=http://<host>:<port> there):
+
+    POST /encode  {"texts": [...], "normalize": false}
+               -> {"shape": [n, 384], "dtype": "float32", "data": "<base64>"}
+    GET  /health  model info and batching stats
+
+Concurrent requests are coalesced into dynamic batches: the batcher takes
+the oldest waiting request, then keeps collecting until it has --max-batch
+texts or --max-wait-ms have passed, and encodes them in one model call.
+
+Run: python -m apps.scraper.embedding_service --host 0.0.0.0 --port 8001
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from apps.scraper.utils.embeddings import DIMENSIONS, MAX_CHARS, MODEL_NAME, encode_local, load_model
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = int(os.getenv("EMBEDDING_SERVICE_MAX_BATCH", "128"))
+MAX_WAIT_MS = float(os.getenv("EMBEDDING_SERVICE_MAX_WAIT_MS", "10"))
+REQUEST_TIMEOUT = 120  # seconds a request waits for its batch
+
+
+class _Pending:
+    __slots__ = ("texts", "normalize", "done", "result", "error")
+
+    def __init__(self, texts, normalize):
+        self.texts = texts
+        self.normalize = normalize
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class DynamicBatcher:
+    """Funnels encode calls from many threads into one model call per batch."""
+
+    def __init__(self, encode, max_batch=MAX_BATCH, max_wait=MAX_WAIT_MS / 1000):
+        self.encode = encode
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def submit(self, texts, normalize=False, timeout=REQUEST_TIMEOUT):
+        pending = _Pending(texts, normalize)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError("embedding batch timed out")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+            self._process(batch, size)
+
+    def _process(self, batch, size):
+        try:
+            vectors = self.encode([text for pending in batch for text in pending.texts])
+        except Exception as e:
+            logger.error(f"❌ Batch of {size} texts failed: {e}", exc_info=True)
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+
+        self.requests += len(batch)
+        self.batches += 1
+        self.texts += size
+
+        offset = 0
+        for pending in batch:
+            result = vectors[offset:offset + len(pending.texts)]
+            offset += len(pending.texts)
+            if pending.normalize:
+                result = result / np.maximum(np.linalg.norm(result, axis=1, keepdims=True), 1e-12)
+            pending.result = result.astype(np.float32, copy=False)
+            pending.done.set()
+
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for the pooled client session
+    batcher = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        batcher = self.batcher
+        self._send_json(200, {
+            "model_name": MODEL_NAME,
+            "dimensions": DIMENSIONS,
+            "requests": batcher.requests,
+            "batches": batcher.batches,
+            "avg_batch_size": batcher.texts / batcher.batches if batcher.batches else 0.0,
+        })
+
+    def do_POST(self):
+        if self.path != "/encode":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            texts = payload["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("texts must be a list of strings")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"bad request: {e}"})
+            return
+
+        if not texts:
+            vectors = np.zeros((0, DIMENSIONS), dtype=np.float32)
+        else:
+            try:
+                vectors = self.batcher.submit([text[:MAX_CHARS] for text in texts], bool(payload.get("normalize")))
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+
+        self._send_json(200, {
+            "shape": list(vectors.shape),
+            "dtype": "float32",
+            "data": base64.b64encode(vectors.tobytes()).decode("ascii"),
+        })
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def serve(host, port, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+    if load_model() is None:
+        raise SystemExit("❌ Could not load the embedding model")
+
+    EmbeddingHandler.batcher = DynamicBatcher(
+        lambda texts: encode_local(texts, normalize=False),
+        max_batch=max_batch,
+        max_wait=max_wait_ms / 1000,
+    )
+    server = ThreadingHTTPServer((host, port), EmbeddingHandler)
+    server.daemon_threads = True
+    logger.info(f"✅ Embedding service listening on {host}:{port} (max batch {max_batch}, max wait {max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="texts per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS, help="how long a batch waits to fill up")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    serve(args.host, args.port, args.max_batch, args.max_wait_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
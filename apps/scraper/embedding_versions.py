@@ -0,0 +1,245 @@
+import logging
+import os
+import re
+import time
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ArticleEmbedding, ArticleEmbeddingStaging, EmbeddingModelVersion
+from .utils.embeddings import DIMENSIONS, MAX_CHARS, MODEL_NAME, encode_with_model
+from .vector_search import (
+    COMPACT_INDEXES,
+    IVFFLAT_INDEX,
+    compact_index_exists,
+    create_compact_index,
+    create_ivfflat_index,
+    drop_compact_index,
+    drop_ivfflat_index,
+    index_exists,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds a process keeps using the active version it last read, so a
+# flip reaches every web/worker process within this window
+VERSION_CACHE_SECONDS = float(os.getenv("EMBEDDING_VERSION_CACHE_SECONDS", "10"))
+
+# How long a flip waits for running queries to let go of the embedding
+# tables before it gives up (and is retried), rather than queueing every
+# new query behind it
+FLIP_LOCK_TIMEOUT = os.getenv("EMBEDDING_FLIP_LOCK_TIMEOUT", "5s")
+
+# What the vectors stored before versioning were (see migration 0012)
+_FALLBACK_VERSION = EmbeddingModelVersion(
+    name=MODEL_NAME, model_name=MODEL_NAME, dimensions=DIMENSIONS, normalized=False, status="active"
+)
+
+_cached_version = None
+_cached_at = 0.0
+
+
+def current_version():
+    """The active EmbeddingModelVersion: what ArticleEmbedding holds and queries must be encoded with."""
+    global _cached_version, _cached_at
+    if _cached_version is None or time.monotonic() - _cached_at > VERSION_CACHE_SECONDS:
+        _cached_version = EmbeddingModelVersion.objects.filter(status="active").first() or _FALLBACK_VERSION
+        _cached_at = time.monotonic()
+    return _cached_version
+
+
+def building_version():
+    return EmbeddingModelVersion.objects.filter(status="building").order_by("created_at").first()
+
+
+def start_version(name, model_name=MODEL_NAME, normalized=True, dimensions=DIMENSIONS):
+    """Register a version to re-embed the archive with (reembed_articles fills it in)."""
+    stored = ArticleEmbedding._meta.get_field("embedding").dimensions
+    if dimensions != stored:
+        raise ValueError(
+            f"{model_name} produces {dimensions}-dim vectors but ArticleEmbedding stores {stored}: "
+            f"migrate ArticleEmbedding.embedding (and its indexes) first"
+        )
+    building = building_version()
+    if building is not None and building.name != name:
+        raise ValueError(f"Version {building.name} is still being built")
+
+    version, _ = EmbeddingModelVersion.objects.get_or_create(
+        name=name,
+        defaults={"model_name": model_name, "dimensions": dimensions, "normalized": normalized},
+    )
+    if version.status != "building":
+        raise ValueError(f"Version {name} is already {version.status}")
+    return version
+
+
+def encode_for_version(version, texts):
+    """Embeddings (lists of floats) of texts under version."""
+    texts = [text[:MAX_CHARS] for text in texts]
+    return encode_with_model(version.model_name, texts, normalize=version.normalized).tolist()
+
+
+def encode_query(text):
+    """Embed a search query so it is comparable with the stored vectors; None for blank text."""
+    if not text or not text.strip():
+        return None
+    return encode_for_version(current_version(), [text])[0]
+
+
+def unstaged_embeddings(version):
+    """Active ArticleEmbedding rows that have no vector under version yet."""
+    staged = ArticleEmbeddingStaging.objects.filter(article_id=OuterRef("article_id"), model_version=version.name)
+    return ArticleEmbedding.objects.filter(~Exists(staged))
+
+
+def coverage(version):
+    """(embeddings staged under version, embeddings to cover)"""
+    total = ArticleEmbedding.objects.count()
+    return total - unstaged_embeddings(version).count(), total
+
+
+def build_staging_indexes():
+    """
+    Build on ArticleEmbeddingStaging the on-demand indexes (compact HNSW,
+    IVFFlat) the live table has, under staging names, so flip() only has
+    to rename them. Stale copies are rebuilt: IVFFlat lists are trained
+    on the rows present at build time. Runs outside any transaction.
+    """
+    for mode in COMPACT_INDEXES:
+        if compact_index_exists(mode):
+            drop_compact_index(mode, model=ArticleEmbeddingStaging)
+            create_compact_index(mode, model=ArticleEmbeddingStaging)
+    if index_exists(IVFFLAT_INDEX):
+        drop_ivfflat_index(model=ArticleEmbeddingStaging)
+        create_ivfflat_index(model=ArticleEmbeddingStaging)
+
+
+def drop_staging_indexes():
+    """Drop the on-demand indexes left on ArticleEmbeddingStaging by a flip."""
+    for mode in COMPACT_INDEXES:
+        if compact_index_exists(mode, model=ArticleEmbeddingStaging):
+            drop_compact_index(mode, model=ArticleEmbeddingStaging)
+    drop_ivfflat_index(model=ArticleEmbeddingStaging)
+
+
+def _schema_objects(cursor, table):
+    """
+    {definition: (kind, name)} of the constraints and the other indexes of
+    table, with the table and object names and the storage parameters (the
+    IVFFlat lists follow the row count) taken out of the definitions so the
+    live and staging copies of an object compare equal.
+    """
+    cursor.execute(
+        """
+        SELECT 'constraint', con.conname, con.contype || ' ' || pg_get_constraintdef(con.oid)
+        FROM pg_constraint con
+        WHERE con.conrelid = %s::regclass
+        UNION ALL
+        SELECT 'index', cls.relname, pg_get_indexdef(idx.indexrelid)
+        FROM pg_index idx JOIN pg_class cls ON cls.oid = idx.indexrelid
+        WHERE idx.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = idx.indexrelid)
+        """,
+        [table, table],
+    )
+    objects = {}
+    for kind, name, definition in cursor.fetchall():
+        definition = re.sub(r" WITH \([^)]*\)", "", definition.replace(name, "").replace(table, ""))
+        objects[definition] = (kind, name)
+    return objects
+
+
+def _swap_names(cursor, live, staging):
+    """
+    Rename statements that give every constraint and index of staging the
+    name of its counterpart on live and vice versa, so each table keeps the
+    names Django's migration state expects for it after the tables trade
+    names. Raises ValueError if an object has no counterpart.
+    """
+    live_objects = _schema_objects(cursor, live)
+    staging_objects = _schema_objects(cursor, staging)
+    unmatched = sorted(
+        [name for definition, (_, name) in live_objects.items() if definition not in staging_objects]
+        + [name for definition, (_, name) in staging_objects.items() if definition not in live_objects]
+    )
+    if unmatched:
+        raise ValueError(f"No counterpart on the other embeddings table for: {', '.join(unmatched)}")
+
+    qn = connection.ops.quote_name
+    statements = []
+    for n, (definition, (kind, live_name)) in enumerate(sorted(live_objects.items())):
+        staging_name = staging_objects[definition][1]
+        if live_name == staging_name:
+            continue
+        temp = f"embedding_flip_{n}"
+        if kind == "constraint":
+            # Still under their old table names when this runs
+            statements += [
+                f"ALTER TABLE {qn(live)} RENAME CONSTRAINT {qn(live_name)} TO {qn(temp)}",
+                f"ALTER TABLE {qn(staging)} RENAME CONSTRAINT {qn(staging_name)} TO {qn(live_name)}",
+                f"ALTER TABLE {qn(live)} RENAME CONSTRAINT {qn(temp)} TO {qn(staging_name)}",
+            ]
+        else:
+            statements += [
+                f"ALTER INDEX {qn(live_name)} RENAME TO {qn(temp)}",
+                f"ALTER INDEX {qn(staging_name)} RENAME TO {qn(live_name)}",
+                f"ALTER INDEX {qn(temp)} RENAME TO {qn(staging_name)}",
+            ]
+    return statements
+
+
+def flip(version):
+    """
+    Make version the active one. ArticleEmbeddingStaging and ArticleEmbedding
+    trade places by renaming both tables and all their constraints and
+    indexes, and the version row becomes active, in one transaction: readers
+    see either all old or all new vectors, nothing is copied, and both
+    tables end up with the names Django expects. Writers are locked out for
+    the coverage check, readers only for the renames. The old vectors end
+    up in the staging table, which is emptied.
+
+    The on-demand indexes of the live table need their staging copies
+    (build_staging_indexes) first, or the flip raises ValueError.
+    Returns False (and changes nothing) while coverage is below 100%.
+    Raises OperationalError if the tables stay busy past FLIP_LOCK_TIMEOUT.
+    """
+    qn = connection.ops.quote_name
+    live = ArticleEmbedding._meta.db_table
+    staging = ArticleEmbeddingStaging._meta.db_table
+
+    # Leftovers of abandoned versions must not go live
+    ArticleEmbeddingStaging.objects.exclude(model_version=version.name).delete()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [FLIP_LOCK_TIMEOUT])
+        cursor.execute(f"LOCK TABLE {qn(live)}, {qn(staging)} IN SHARE ROW EXCLUSIVE MODE")
+
+        missing = unstaged_embeddings(version).count()
+        if missing:
+            logger.info(f"⏳ {version.name}: {missing} embeddings left to re-embed, not flipping yet")
+            return False
+
+        cursor.execute(f"LOCK TABLE {qn(live)}, {qn(staging)} IN ACCESS EXCLUSIVE MODE")
+        for statement in _swap_names(cursor, live, staging) + [
+            f"ALTER TABLE {qn(live)} RENAME TO {qn(live + '_flip')}",
+            f"ALTER TABLE {qn(staging)} RENAME TO {qn(live)}",
+            f"ALTER TABLE {qn(live + '_flip')} RENAME TO {qn(staging)}",
+            f"TRUNCATE {qn(staging)}",
+        ]:
+            cursor.execute(statement)
+
+        EmbeddingModelVersion.objects.filter(status="active").update(status="retired")
+        version.status = "active"
+        version.activated_at = timezone.now()
+        version.save(update_fields=["status", "activated_at"])
+
+    global _cached_version
+    _cached_version = None
+    logger.info(f"✅ Flipped embeddings to {version.name}")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {qn(live)}")
+    # Empty now, and rebuilt from the new vectors before the next flip
+    drop_staging_indexes()
+    return True
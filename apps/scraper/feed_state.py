@@ -0,0 +1,188 @@
+import os
+import random
+import threading
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import FeedState
+
+# Enough to cover a full feed document plus a few cycles of history
+MAX_SEEN_GUIDS = 500
+VERSION_SEP = "\t"  # between GUID and updated timestamp in a seen key
+
+# Adaptive polling (seconds). The beat job runs every MIN_POLL_INTERVAL and
+# only polls the feeds that are due.
+MIN_POLL_INTERVAL = int(os.getenv("FEED_MIN_POLL_INTERVAL", "300"))
+MAX_POLL_INTERVAL = int(os.getenv("FEED_MAX_POLL_INTERVAL", "21600"))
+TARGET_NEW_PER_POLL = 3   # poll often enough to find ~3 new items each time
+RATE_SMOOTHING = 0.3      # EWMA weight of the latest observed rate
+IDLE_BACKOFF = 1.5        # interval growth after a poll with nothing new
+JITTER = 0.1              # +/-10% so feeds don't all come due together
+
+
+def entry_guid(entry):
+    """Stable identity of a feed entry: its GUID, falling back to the link."""
+    return entry.get("id") or entry.get("guid") or entry.get("link") or ""
+
+
+def entry_version(entry):
+    """
+    Seen-key of one revision of a feed entry: its GUID plus the entry's
+    updated timestamp, so an edited entry is noticed even though its GUID
+    was seen before. Entries without a timestamp are keyed by GUID alone.
+    """
+    guid = entry_guid(entry)
+    updated = entry.get("updated") or ""
+    return f"{guid}{VERSION_SEP}{updated}" if guid and updated else guid
+
+
+def _guid_of(key):
+    return key.split(VERSION_SEP, 1)[0]
+
+
+class FeedStateStore:
+    """
+    Per-feed ETag / Last-Modified / seen-GUID / schedule state for one scrape run.
+
+    All rows are loaded in one query up front and written back in bulk by
+    save(), so worker threads never touch the database themselves.
+    """
+
+    def __init__(self, urls):
+        urls = [url for url in urls if url]
+        existing = {state.url: state for state in FeedState.objects.filter(url__in=urls)}
+        self._states = {url: existing.get(url) or FeedState(url=url) for url in urls}
+        self._seen = {url: set(state.seen_guids or []) for url, state in self._states.items()}
+        self._known = {url: {_guid_of(key) for key in seen} for url, seen in self._seen.items()}
+        self._lock = threading.Lock()
+
+    def request_headers(self, url):
+        """Conditional request headers for the next poll of url."""
+        state = self._states.get(url)
+        headers = {}
+        if state is not None and state.etag:
+            headers["If-None-Match"] = state.etag
+        if state is not None and state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+        return headers
+
+    def is_seen(self, url, key):
+        """True if this revision of the entry (see entry_version) was seen."""
+        return bool(key) and key in self._seen.get(url, ())
+
+    def is_known(self, url, guid):
+        """True if any revision of the entry was seen."""
+        return bool(guid) and guid in self._known.get(url, ())
+
+    def is_due(self, url):
+        state = self._states.get(url)
+        return state is None or state.next_poll_at is None or state.next_poll_at <= timezone.now()
+
+    def record(self, url, response, guids=()):
+        """
+        Remember the validators of a poll and the seen-keys it returned, then
+        reschedule. Only entries with a GUID never seen before count as new
+        items; a revised entry does not speed the feed's polling up.
+        """
+        state = self._states.get(url)
+        if state is None:
+            return
+
+        new_items = 0
+        with self._lock:
+            state.last_status = response.status_code
+            if response.status_code != 304:
+                state.etag = response.headers.get("ETag", "")[:512]
+                state.last_modified = response.headers.get("Last-Modified", "")[:128]
+
+                current = [key for key in dict.fromkeys(guids) if key]
+                new_items = len({_guid_of(key) for key in current} - self._known[url])
+                current_set = set(current)
+                older = [key for key in (state.seen_guids or []) if key not in current_set]
+                state.seen_guids = (current + older)[:max(MAX_SEEN_GUIDS, len(current))]
+                self._seen[url] = set(state.seen_guids)
+                self._known[url] = {_guid_of(key) for key in self._seen[url]}
+
+        self.schedule(url, new_items)
+
+    def record_failure(self, url):
+        """A failed poll backs off like a poll that found nothing."""
+        self.schedule(url, 0)
+
+    def schedule(self, url, new_items):
+        """
+        Update the feed's publish-rate estimate from one poll and pick its
+        next poll time: ~TARGET_NEW_PER_POLL items apart for busy feeds,
+        backing off by IDLE_BACKOFF while nothing new shows up, with jitter.
+        """
+        state = self._states.get(url)
+        if state is None:
+            return
+
+        with self._lock:
+            now = timezone.now()
+            if state.last_polled_at:
+                elapsed = max((now - state.last_polled_at).total_seconds(), 60)
+                observed = new_items * 3600 / elapsed
+                state.items_per_hour = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * state.items_per_hour
+            else:
+                state.items_per_hour = new_items * 3600 / state.poll_interval
+
+            if new_items == 0:
+                interval = state.poll_interval * IDLE_BACKOFF
+            else:
+                interval = TARGET_NEW_PER_POLL * 3600 / max(state.items_per_hour, 1e-6)
+            interval = min(max(interval, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+            state.poll_interval = int(interval)
+            state.next_poll_at = now + timedelta(seconds=interval * random.uniform(1 - JITTER, 1 + JITTER))
+            state.last_polled_at = now
+
+    def save(self):
+        polled = [state for state in self._states.values() if state.last_polled_at]
+        new = [state for state in polled if state.pk is None]
+        known = [state for state in polled if state.pk is not None]
+
+        if new:
+            FeedState.objects.bulk_create(new, ignore_conflicts=True)
+        if known:
+            FeedState.objects.bulk_update(
+                known,
+                [
+                    "etag", "last_modified", "seen_guids", "last_status", "last_polled_at",
+                    "items_per_hour", "poll_interval", "next_poll_at",
+                ],
+            )
+
+
+class MemoryFeedState:
+    """
+    FeedStateStore stand-in that never touches the database: no conditional
+    requests, nothing skipped as seen, nothing saved. For ad-hoc fetches that
+    don't store articles, so they can't hide entries from the next ingest.
+    """
+
+    def request_headers(self, url):
+        return {}
+
+    def is_seen(self, url, key):
+        return False
+
+    def is_known(self, url, guid):
+        return False
+
+    def is_due(self, url):
+        return True
+
+    def record(self, url, response, guids=()):
+        pass
+
+    def record_failure(self, url):
+        pass
+
+    def schedule(self, url, new_items):
+        pass
+
+    def save(self):
+        pass
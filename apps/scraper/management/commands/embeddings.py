@@ -0,0 +1,252 @@
+"""
+Bulk export/import of article embeddings with COPY ... (FORMAT binary).
+
+    python manage.py embeddings export DIR [--chunk-size 50000]
+    python manage.py embeddings import DIR
+    python manage.py embeddings import FILE.jsonl
+
+An export is a directory of COPY binary parts (url, model_version, vector)
+plus manifest.json, which doubles as the checkpoint: an interrupted export
+resumes after the last finished part. Imports match rows to articles by
+url, upsert them one part (or --chunk-size jsonl lines) per transaction
+and record progress in import-state.json / FILE.jsonl.checkpoint, so they
+resume the same way. Vectors must have the dimensions ArticleEmbedding
+stores, and an export (or jsonl file) only loads into a database using
+the same active embedding version.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.scraper.config import JSON_PATH
+from apps.scraper.embedding_versions import current_version
+from apps.scraper.models import Article, ArticleEmbedding
+
+MANIFEST = "manifest.json"
+IMPORT_STATE = "import-state.json"
+STAGE_TABLE = "embedding_import"
+
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _write_json(path, data):
+    # Write-then-rename: a crash never leaves a half-written checkpoint
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = "Export/import article embeddings with binary COPY (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["export", "import"])
+        parser.add_argument("path", nargs="?", help="export directory, or a .jsonl file to import")
+        parser.add_argument("--chunk-size", type=int, default=50000, help="rows per part / per transaction")
+        parser.add_argument(
+            "--model-version",
+            help="version the vectors of a jsonl import were made with; must be the active one (the default)",
+        )
+        parser.add_argument("--restart", action="store_true", help="ignore existing checkpoints")
+
+    def handle(self, *args, action, path, chunk_size, model_version, restart, **options):
+        self.dimensions = ArticleEmbedding._meta.get_field("embedding").dimensions
+        self.table = ArticleEmbedding._meta.db_table
+        started = time.monotonic()
+
+        if action == "export":
+            if not path:
+                raise CommandError("export needs a target directory")
+            rows = self.export(path, chunk_size, restart)
+        elif not path or path.endswith(".jsonl"):
+            rows = self.import_jsonl(path or JSON_PATH, chunk_size, model_version, restart)
+        else:
+            rows = self.import_parts(path, restart)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {action}: {rows} embeddings in {time.monotonic() - started:.1f}s"))
+
+    # ---------------------------------------------------------------
+    # Export
+    # ---------------------------------------------------------------
+
+    def export(self, directory, chunk_size, restart):
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, MANIFEST)
+        version = current_version().name
+        manifest = None if restart else _read_json(manifest_path, None)
+        if manifest is None:
+            manifest = {"dimensions": self.dimensions, "model_version": version, "parts": [], "complete": False}
+        elif manifest["model_version"] != version or manifest["dimensions"] != self.dimensions:
+            raise CommandError(
+                f"{directory} holds a {manifest['dimensions']}-dim {manifest['model_version']} export, "
+                f"the database has {self.dimensions}-dim {version}: use --restart or another directory"
+            )
+        if manifest["complete"]:
+            self.stdout.write(f"{directory} is already a complete export")
+            return sum(part["rows"] for part in manifest["parts"])
+
+        last_id = manifest["parts"][-1]["last_id"] if manifest["parts"] else 0
+        article_table = Article._meta.db_table
+        while True:
+            ids = list(
+                ArticleEmbedding.objects.filter(article_id__gt=last_id, model_version=version)
+                .order_by("article_id")
+                .values_list("article_id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+
+            name = f"part-{len(manifest['parts']) + 1:05d}.pgcopy"
+            with connection.cursor() as cursor, open(os.path.join(directory, name), "wb") as f:
+                copy_sql = (
+                    f"COPY (SELECT a.url, e.model_version, e.embedding FROM {self.table} e "
+                    f"JOIN {article_table} a ON a.id = e.article_id "
+                    f"WHERE e.article_id BETWEEN %s AND %s AND e.model_version = %s ORDER BY e.article_id) "
+                    f"TO STDOUT (FORMAT binary)"
+                )
+                with cursor.cursor.copy(copy_sql, (ids[0], ids[-1], version)) as copy:
+                    for data in copy:
+                        f.write(data)
+
+            last_id = ids[-1]
+            manifest["parts"].append({"file": name, "rows": len(ids), "last_id": last_id})
+            _write_json(manifest_path, manifest)
+            self.stdout.write(f"📦 {name}: {len(ids)} embeddings (up to article {last_id})")
+
+        manifest["complete"] = True
+        _write_json(manifest_path, manifest)
+        return sum(part["rows"] for part in manifest["parts"])
+
+    # ---------------------------------------------------------------
+    # Import
+    # ---------------------------------------------------------------
+
+    def _create_stage(self, cursor):
+        # Typed vector(n) column: pgvector rejects vectors of other sizes on the way in
+        cursor.execute(
+            f"CREATE TEMP TABLE {STAGE_TABLE} (url text, model_version text, embedding vector({self.dimensions})) "
+            f"ON COMMIT DROP"
+        )
+
+    def _merge_stage(self, cursor):
+        """Upsert staged rows into ArticleEmbedding; returns (merged, unknown urls)."""
+        article_table = Article._meta.db_table
+        # ON CONFLICT can't touch the same row twice in one statement: one row per url
+        cursor.execute(
+            f"INSERT INTO {self.table} (article_id, model_version, embedding, generated_at) "
+            f"SELECT a.id, s.model_version, s.embedding, now() "
+            f"FROM (SELECT DISTINCT ON (url) * FROM {STAGE_TABLE}) s "
+            f"JOIN {article_table} a ON a.url = s.url "
+            f"ON CONFLICT (article_id) DO UPDATE SET "
+            f"embedding = EXCLUDED.embedding, model_version = EXCLUDED.model_version, generated_at = EXCLUDED.generated_at"
+        )
+        merged = cursor.rowcount
+        cursor.execute(f"SELECT count(DISTINCT url) FROM {STAGE_TABLE}")
+        return merged, cursor.fetchone()[0] - merged
+
+    def import_parts(self, directory, restart):
+        manifest = _read_json(os.path.join(directory, MANIFEST), None)
+        if manifest is None:
+            raise CommandError(f"No {MANIFEST} in {directory}")
+        if manifest["dimensions"] != self.dimensions:
+            raise CommandError(f"Export has {manifest['dimensions']}-dim vectors, ArticleEmbedding stores {self.dimensions}")
+        version = current_version().name
+        if manifest["model_version"] != version:
+            raise CommandError(f"Export was made with {manifest['model_version']}, this database uses {version}")
+        if not manifest["complete"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ {directory} is an incomplete export, importing its finished parts"))
+
+        state_path = os.path.join(directory, IMPORT_STATE)
+        state = {"done": []} if restart else _read_json(state_path, {"done": []})
+        imported = 0
+        for part in manifest["parts"]:
+            if part["file"] in state["done"]:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                self._create_stage(cursor)
+                with open(os.path.join(directory, part["file"]), "rb") as f:
+                    with cursor.cursor.copy(f"COPY {STAGE_TABLE} FROM STDIN (FORMAT binary)") as copy:
+                        while data := f.read(1 << 20):
+                            copy.write(data)
+                merged, unknown = self._merge_stage(cursor)
+
+            state["done"].append(part["file"])
+            _write_json(state_path, state)
+            imported += merged
+            self.stdout.write(f"📥 {part['file']}: {merged} embeddings, {unknown} without a matching article")
+        return imported
+
+    def import_jsonl(self, path, chunk_size, model_version, restart):
+        """Lines of {"url": ..., "embedding": [...]} (the format of data/embeddings.jsonl)."""
+        from pgvector.psycopg import register_vector
+
+        version = current_version().name
+        if model_version and model_version != version:
+            # Vectors of another model would be compared with queries encoded by the active one
+            raise CommandError(f"Vectors made with {model_version} can't be imported, this database uses {version}")
+        model_version = version
+        checkpoint_path = f"{path}.checkpoint"
+        start_line = 0 if restart else _read_json(checkpoint_path, {"line": 0})["line"]
+
+        connection.ensure_connection()
+        register_vector(connection.connection)
+
+        imported = 0
+        try:
+            imported = self._copy_jsonl(path, chunk_size, model_version, start_line, checkpoint_path)
+        finally:
+            # The vector loaders registered above would change what ORM reads return
+            connection.close()
+        return imported
+
+    def _copy_jsonl(self, path, chunk_size, model_version, start_line, checkpoint_path):
+        imported = 0
+        with open(path, "r", encoding="utf-8") as f:
+            lines = enumerate(f, start=1)
+            for _ in range(start_line):
+                next(lines, None)
+
+            line_no = start_line
+            while True:
+                batch = []
+                for line_no, line in lines:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    vector = np.asarray(record["embedding"], dtype=np.float32)
+                    if vector.shape != (self.dimensions,):
+                        raise CommandError(
+                            f"{path}:{line_no}: {vector.shape[0] if vector.ndim == 1 else vector.shape} dims, "
+                            f"expected {self.dimensions}"
+                        )
+                    batch.append((record["url"], model_version, vector))
+                    if len(batch) >= chunk_size:
+                        break
+                if not batch:
+                    break
+
+                with transaction.atomic(), connection.cursor() as cursor:
+                    self._create_stage(cursor)
+                    with cursor.cursor.copy(f"COPY {STAGE_TABLE} (url, model_version, embedding) FROM STDIN (FORMAT binary)") as copy:
+                        copy.set_types(["text", "text", "vector"])
+                        for row in batch:
+                            copy.write_row(row)
+                    merged, unknown = self._merge_stage(cursor)
+
+                _write_json(checkpoint_path, {"line": line_no})
+                imported += merged
+                self.stdout.write(f"📥 up to line {line_no}: {merged} embeddings, {unknown} without a matching article")
+
+        return imported
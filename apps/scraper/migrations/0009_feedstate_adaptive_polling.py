@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0008_article_simhash_duplicate_of'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedstate',
+            name='items_per_hour',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='feedstate',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedstate',
+            name='poll_interval',
+            field=models.PositiveIntegerField(default=900),
+        ),
+    ]
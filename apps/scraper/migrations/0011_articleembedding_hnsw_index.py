@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-17 13:37
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY can't run in a transaction; it keeps the table writable
+    # while the HNSW graph is built
+    atomic = False
+
+    dependencies = [
+        ('scraper', '0010_article_content_hash'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name='articleembedding',
+            name='scraper_art_embeddi_0ce1c6_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='articleembedding',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='articleembedding_hnsw_cos', opclasses=['vector_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0 on 2026-10-17 13:43
+
+import django.db.models.deletion
+import pgvector.django.vector
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def register_current_version(apps, schema_editor):
+    """Existing vectors: unnormalized all-MiniLM-L6-v2 outputs."""
+    EmbeddingModelVersion = apps.get_model('scraper', 'EmbeddingModelVersion')
+    EmbeddingModelVersion.objects.get_or_create(
+        name='all-MiniLM-L6-v2',
+        defaults={
+            'model_name': 'all-MiniLM-L6-v2',
+            'dimensions': 384,
+            'normalized': False,
+            'status': 'active',
+            'activated_at': timezone.now(),
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0011_articleembedding_hnsw_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleEmbeddingStaging',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='staged_embedding', serialize=False, to='scraper.article')),
+                ('model_version', models.CharField(max_length=100)),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=384)),
+                ('generated_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EmbeddingModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('model_name', models.CharField(max_length=200)),
+                ('dimensions', models.PositiveIntegerField(default=384)),
+                ('normalized', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('building', 'Building'), ('active', 'Active'), ('retired', 'Retired')], default='building', max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='articleembedding',
+            name='model_version',
+            field=models.CharField(default='all-MiniLM-L6-v2', max_length=100),
+        ),
+        migrations.RunPython(register_current_version, migrations.RunPython.noop),
+    ]
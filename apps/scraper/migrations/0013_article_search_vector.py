@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-17 13:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Adding the stored generated column rewrites scraper_article once (under
+    # an exclusive lock); the GIN index is then built concurrently like 0011,
+    # so scraping keeps writing articles meanwhile
+    atomic = False
+
+    dependencies = [
+        ('scraper', '0012_embedding_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('title', 'text', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        AddIndexConcurrently(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0013_article_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='extractor',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-17 15:50
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Concurrently like 0011: a version may be being built into the table
+    atomic = False
+
+    dependencies = [
+        ('scraper', '0014_article_extractor'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='articleembeddingstaging',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='articleembeddingstaging_hnsw_cos', opclasses=['vector_cosine_ops']),
+        ),
+    ]
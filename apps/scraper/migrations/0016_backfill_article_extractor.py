@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-17 16:20
+
+import json
+import os
+
+from django.db import migrations
+
+RSS_SOURCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'feeds', 'rss_sources.json')
+BATCH = 10000
+
+
+def backfill_extractor(apps, schema_editor):
+    """
+    Rows stored before 0014 don't record their extractor. Feed articles
+    carry the source name and category of an entry in rss_sources.json;
+    everything else came from NewsAPI (whose categories differ, e.g.
+    "technology" vs "tech"), which joined the <p> texts of the page.
+    """
+    Article = apps.get_model('scraper', 'Article')
+    try:
+        with open(RSS_SOURCES, 'r', encoding='utf-8') as f:
+            feeds = json.load(f)
+    except (OSError, ValueError):
+        feeds = {}
+    categories = list(feeds)
+    sources = [feed.get('source') for category_feeds in feeds.values() for feed in category_feeds]
+
+    last_id = 0
+    while True:
+        ids = list(
+            Article.objects.filter(id__gt=last_id, extractor='').order_by('id').values_list('id', flat=True)[:BATCH]
+        )
+        if not ids:
+            break
+        rows = Article.objects.filter(id__gte=ids[0], id__lte=ids[-1], extractor='')
+        rows.filter(source__in=sources, category__in=categories).update(extractor='article')
+        rows.update(extractor='paragraphs')  # the feed rows no longer match extractor=''
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    # One transaction per batch, so the table isn't locked row by row for the whole backfill
+    atomic = False
+
+    dependencies = [
+        ('scraper', '0015_articleembeddingstaging_hnsw_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_extractor, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,15 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 #from django.contrib.postgres.fields import ArrayField
-from pgvector.django import VectorField  # new
+from pgvector.django import HnswIndex, VectorField  # new
+
+
+class ArticleManager(models.Manager):
+    def get_queryset(self):
+        # search_vector is only read inside Postgres (search and ranking),
+        # never worth shipping to Python with every article
+        return super().get_queryset().defer("search_vector")
 
 
 class Article(models.Model):
@@ -22,8 +31,42 @@ class Article(models.Model):
     # Status for processing pipeline
     status = models.CharField(max_length=32, default="pending")
 
+    # sha256 of the normalized title/text/summary, to skip rewriting unchanged rows
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+
+    # What turned the fetched page into `text`, so re-extraction from the HTML
+    # cache uses the same one: "article" (feeds, newspaper) or "paragraphs"
+    # (NewsAPI, every <p>); older rows were backfilled from their source (0016)
+    extractor = models.CharField(max_length=16, blank=True, default="")
+
+    # Near-duplicate detection: SimHash of the cleaned text, and the first
+    # copy of the same story (cluster root) when this row is a duplicate
+    simhash = models.BigIntegerField(null=True, blank=True)
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates'
+    )
+
     scraped_at = models.DateTimeField(auto_now_add=True)
 
+    # Full-text search document (chatbot SQL retrieval), kept up to date by
+    # Postgres so search and ranking read it instead of re-parsing the text
+    search_vector = models.GeneratedField(
+        expression=SearchVector('title', 'text', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = ArticleManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+        ]
+
     def __str__(self):
         return f"{self.title[:50]} ({self.source})"
     
@@ -35,13 +78,103 @@ class ArticleEmbedding(models.Model):
         primary_key=True
     )
     embedding = VectorField(dimensions=384)
+    # EmbeddingModelVersion.name of the encoder that produced the vector
+    model_version = models.CharField(max_length=100, default='all-MiniLM-L6-v2')
     generated_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=['embedding']),
+            # ANN index for ORDER BY embedding <=> query (cosine distance);
+            # query-time recall is tuned with hnsw.ef_search (see vector_search.py)
+            HnswIndex(
+                name='articleembedding_hnsw_cos',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+            # The compact halfvec/binary indexes are built on demand, see
+            # create_compact_index() in vector_search.py
         ]
 
     
     def __str__(self):
-        return f"Embedding for: {self.article.title[:50]}"
\ No newline at end of file
+        return f"Embedding for: {self.article.title[:50]}"
+
+
+class EmbeddingModelVersion(models.Model):
+    """
+    An encoder configuration article embeddings are produced with. Exactly
+    one version is active (the one ArticleEmbedding holds); a new one is
+    filled into ArticleEmbeddingStaging while building, then flipped in.
+    """
+    STATUS_CHOICES = [
+        ('building', 'Building'),
+        ('active', 'Active'),
+        ('retired', 'Retired'),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    model_name = models.CharField(max_length=200)
+    dimensions = models.PositiveIntegerField(default=384)
+    normalized = models.BooleanField(default=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='building')
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class ArticleEmbeddingStaging(models.Model):
+    """
+    Embedding of an article under the version being built, kept out of
+    ArticleEmbedding until the version is flipped in. Same columns and HNSW
+    index as ArticleEmbedding: the flip renames both tables so they trade
+    places (see embedding_versions.flip).
+    """
+    article = models.OneToOneField(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='staged_embedding',
+        primary_key=True
+    )
+    model_version = models.CharField(max_length=100)
+    embedding = VectorField(dimensions=384)
+    generated_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Trades names with articleembedding_hnsw_cos on every flip
+            HnswIndex(
+                name='articleembeddingstaging_hnsw_cos',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f"Staged {self.model_version} embedding for article {self.article_id}"
+
+
+class FeedState(models.Model):
+    """
+    Conditional-GET bookkeeping for one RSS feed, so quiet feeds cost a 304.
+    """
+    url = models.URLField(max_length=1000, unique=True)
+    etag = models.CharField(max_length=512, blank=True)
+    last_modified = models.CharField(max_length=128, blank=True)
+    # GUIDs (or links) of recently seen entries, newest first
+    seen_guids = models.JSONField(default=list, blank=True)
+    last_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_polled_at = models.DateTimeField(null=True, blank=True)
+
+    # Adaptive polling: learned publish rate and when the feed is due again
+    items_per_hour = models.FloatField(default=0.0)
+    poll_interval = models.PositiveIntegerField(default=900)  # seconds
+    next_poll_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"Feed state for: {self.url[:80]}"
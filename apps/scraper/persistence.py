@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import re
+from datetime import timedelta
+
+from dateutil.parser import parse as parse_date
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .embedding_queue import enqueue_embeddings
+from .models import Article, ArticleEmbedding, ArticleEmbeddingStaging
+from .utils.simhash import WINDOW_DAYS, SimHashIndex
+
+logger = logging.getLogger(__name__)
+
+# Columns overwritten when a scraped URL already exists
+ARTICLE_UPDATE_FIELDS = [
+    "title", "text", "category", "source", "summary", "published_at", "status",
+    "simhash", "duplicate_of", "content_hash", "extractor",
+]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def compute_content_hash(title, text, summary):
+    """sha256 of the whitespace/case-normalized content that downstream jobs consume."""
+    normalized = "\x1f".join(
+        _WHITESPACE_RE.sub(" ", part or "").strip().lower() for part in (title, text, summary)
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def build_article(a):
+    """Turn a scraped article dict into an unsaved Article (None without a URL)."""
+    url = a.get("url")
+    if not url:
+        return None
+
+    text = a.get("text") or ""
+    published_at = None
+    if a.get("published_at"):
+        try:
+            published_at = parse_date(a["published_at"])
+        except Exception:
+            pass
+
+    title = a.get("title") or "[No title]"
+    summary = a.get("summary") or text[:300]
+    is_duplicate = bool(a.get("duplicate_of") or a.get("duplicate_of_url"))
+    return Article(
+        url=url,
+        title=title,
+        text=text,
+        category=a.get("category") or "",
+        source=a.get("source") or "",
+        summary=summary,
+        published_at=published_at,
+        content_hash=compute_content_hash(title, text, summary),
+        status="duplicate" if is_duplicate else "pending",
+        simhash=a.get("simhash"),
+        duplicate_of_id=a.get("duplicate_of"),
+        extractor=a.get("extractor") or "",
+    )
+
+
+def _link_duplicates(root_urls):
+    """Point rows at cluster roots that were only known by URL when scraped."""
+    ids = dict(Article.objects.filter(url__in=set(root_urls.values())).values_list("url", "id"))
+    for url, root_url in root_urls.items():
+        if root_url in ids:
+            Article.objects.filter(url=url).update(duplicate_of_id=ids[root_url])
+
+
+def _upsert_changed(articles):
+    """
+    One INSERT ... ON CONFLICT (url) DO UPDATE for articles, leaving rows
+    whose content hash did not change untouched. Returns {url: (id, inserted)}
+    for the rows it wrote: inserted is xmax = 0 of the row the statement
+    produced, so two sources upserting the same URL at once can't both
+    count it as new.
+    """
+    qn = connection.ops.quote_name
+    table = qn(Article._meta.db_table)
+    fields = [
+        field for field in Article._meta.concrete_fields
+        if not field.primary_key and not getattr(field, "generated", False)
+    ]
+    updates = [Article._meta.get_field(name).column for name in ARTICLE_UPDATE_FIELDS]
+
+    params = []
+    for article in articles:
+        params.extend(field.get_db_prep_save(field.pre_save(article, True), connection) for field in fields)
+    row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(field.column) for field in fields)}) "
+        f"VALUES {', '.join([row] * len(articles))} "
+        f"ON CONFLICT ({qn('url')}) DO UPDATE SET {', '.join(f'{qn(c)} = EXCLUDED.{qn(c)}' for c in updates)} "
+        f"WHERE {table}.{qn('content_hash')} IS DISTINCT FROM EXCLUDED.{qn('content_hash')} "
+        f"RETURNING {qn('id')}, {qn('url')}, (xmax = 0)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {url: (article_id, inserted) for article_id, url, inserted in cursor.fetchall()}
+
+
+def _upsert_batch(rows, root_urls):
+    """
+    Upsert the rows of a batch, writing only those that are new or whose
+    content hash changed. Returns (new, updated, unchanged).
+    """
+    with transaction.atomic():
+        written = _upsert_changed(list(rows.values()))
+        changed = []
+        for url, (article_id, _) in written.items():
+            rows[url].pk = article_id
+            changed.append(rows[url])
+
+        # Rewritten rows go back through the embedding queue
+        updated_urls = [url for url, (_, inserted) in written.items() if not inserted]
+        if updated_urls:
+            ArticleEmbedding.objects.filter(article__url__in=updated_urls).delete()
+            ArticleEmbeddingStaging.objects.filter(article__url__in=updated_urls).delete()
+
+        links = {url: root for url, root in root_urls.items() if url in written}
+        if links:
+            _link_duplicates(links)
+
+        # New and rewritten cluster roots get embedded within seconds
+        embed_ids = [
+            article.pk for article in changed
+            if article.duplicate_of_id is None and article.url not in links
+        ]
+        transaction.on_commit(lambda: enqueue_embeddings(embed_ids))
+
+    new = len(written) - len(updated_urls)
+    return new, len(updated_urls), len(rows) - len(written)
+
+
+def bulk_upsert_articles(articles, batch_size=500):
+    """
+    Insert or update scraped article dicts in batches of batch_size.
+
+    Each batch is one upsert statement inside a transaction; the new/updated
+    split comes from the rows it returns, so it stays exact with sources
+    writing in parallel. Rows whose content hash did not change are not
+    written at all.
+    Returns {"new": ..., "updated": ..., "unchanged": ..., "failed": ...}.
+    """
+    totals = {"new": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    rows = {}
+    root_urls = {}  # duplicate url -> url of its cluster root
+
+    def flush():
+        if not rows:
+            return
+        try:
+            new, updated, unchanged = _upsert_batch(rows, root_urls)
+            totals["new"] += new
+            totals["updated"] += updated
+            totals["unchanged"] += unchanged
+            logger.info(f"💾 Batch saved: {new} new, {updated} updated, {unchanged} unchanged")
+        except Exception as e:
+            totals["failed"] += len(rows)
+            logger.error(f"❌ Batch of {len(rows)} failed: {e}")
+        rows.clear()
+        root_urls.clear()
+
+    for a in articles:
+        article = build_article(a)
+        if article is None:
+            continue
+        # ON CONFLICT can't touch the same row twice in one statement: last copy wins
+        rows[article.url] = article
+        if a.get("duplicate_of_url"):
+            root_urls[article.url] = a["duplicate_of_url"]
+        if len(rows) >= batch_size:
+            flush()
+    flush()
+
+    return totals
+
+
+def link_near_duplicates(since_id):
+    """
+    Cluster near-duplicates among rows stored after since_id.
+
+    Sources scraped in parallel only see each other's articles once they are
+    saved, so two copies of a story written at the same moment both end up
+    as cluster roots. This replays the SimHash window in id order and links
+    every new root that matches an older row, moving its own duplicates
+    along. Returns how many rows were re-linked.
+    """
+    rows = (
+        Article.objects.filter(
+            simhash__isnull=False,
+            scraped_at__gte=timezone.now() - timedelta(days=WINDOW_DAYS),
+        )
+        .order_by("id")
+        .values_list("id", "url", "simhash", "duplicate_of_id")
+        .iterator(chunk_size=5000)
+    )
+
+    index = SimHashIndex()
+    moved = {}  # former root id -> the older root it now belongs to
+    for article_id, url, fingerprint, duplicate_of_id in rows:
+        root = moved.get(duplicate_of_id, duplicate_of_id)
+        if article_id > since_id and duplicate_of_id is None:
+            root = index.find(fingerprint, url)
+            if root is not None:
+                moved[article_id] = root
+        index.add(root or article_id, fingerprint, url)
+
+    if not moved:
+        return 0
+
+    with transaction.atomic():
+        for old_root, root in moved.items():
+            Article.objects.filter(duplicate_of_id=old_root).update(duplicate_of_id=root)
+        Article.objects.bulk_update(
+            [Article(id=article_id, duplicate_of_id=root, status="duplicate") for article_id, root in moved.items()],
+            ["duplicate_of", "status"],
+        )
+    logger.info(f"🔗 Linked {len(moved)} near-duplicates stored by parallel sources")
+    return len(moved)
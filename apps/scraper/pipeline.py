@@ -0,0 +1,66 @@
+import logging
+
+from .feed_state import FeedStateStore
+from .persistence import bulk_upsert_articles
+from .scraper import clean_articles, dedupe_articles, iter_articles, load_sources, source_urls
+from .utils.api_fetcher import NEWSAPI_CATEGORIES, newsapi_source_url
+from .utils.simhash import get_simhash_index
+
+logger = logging.getLogger(__name__)
+
+# Small batches: memory stays flat and a crash loses at most one batch
+INGEST_BATCH_SIZE = 50
+
+
+def due_sources():
+    """(feed URLs, NewsAPI categories) whose adaptive poll time has come."""
+    feed_urls = [feed.get("url") for feeds in load_sources().values() for feed in feeds if feed.get("url")]
+    feed_state = FeedStateStore(source_urls(feed_urls))
+    return (
+        [url for url in feed_urls if feed_state.is_due(url)],
+        [category for category in NEWSAPI_CATEGORIES if feed_state.is_due(newsapi_source_url(category))],
+    )
+
+
+def run_ingest(skip_known=True, only_due=True, batch_size=INGEST_BATCH_SIZE, feed_urls=None, newsapi_categories=None):
+    """
+    Streaming scrape: fetch -> clean -> dedupe -> batch-persist.
+
+    Near-duplicate stories are stored with status "duplicate" and linked
+    to the first copy, so embedding and the feeds skip them. With only_due,
+    only sources whose adaptive poll time has come are fetched.
+
+    Articles are written every batch_size items instead of after the whole
+    run. Feed state is saved only once every batch is stored, so a crashed
+    run (or one with a failed batch) re-polls its feeds and the URL index
+    skips what was saved.
+    feed_urls / newsapi_categories limit the run to those sources; only
+    their state is loaded and written back, so runs over disjoint sources
+    can go in parallel.
+    Returns {"new": ..., "updated": ..., "failed": ..., "total": ...}.
+    """
+    feed_state = FeedStateStore(source_urls(feed_urls, newsapi_categories))
+    seen = {"total": 0}
+
+    def counted(articles):
+        for a in articles:
+            seen["total"] += 1
+            yield a
+
+    simhash_index = get_simhash_index()
+    articles = clean_articles(iter_articles(feed_state, skip_known, only_due, feed_urls, newsapi_categories))
+    stream = counted(dedupe_articles(articles, simhash_index=simhash_index))
+    try:
+        totals = bulk_upsert_articles(stream, batch_size=batch_size)
+    finally:
+        # This run's roots are rows now (or lost); the next refresh() re-adds them by id
+        simhash_index.drop_pending()
+    # Saving would mark the GUIDs of a failed batch as seen and lose those
+    # articles for good; unsaved, the next run re-polls and refetches them
+    if totals["failed"]:
+        logger.warning(f"⚠️ {totals['failed']} articles failed to store, feed state not saved")
+    else:
+        feed_state.save()
+
+    totals["total"] = seen["total"]
+    return totals
@@ -4,9 +4,17 @@ import logging
 import os
 from datetime import datetime
 from newspaper import Article as NewspaperArticle
+from newspaper import Config as NewspaperConfig
 
+from apps.scraper.config import ARTICLE_TIMEOUT, FEED_TIMEOUT
+from apps.scraper.feed_state import MemoryFeedState, entry_guid, entry_version
 from apps.scraper.utils.cleaner import clean_text
-from apps.scraper.utils.api_fetcher import fetch_newsapi_articles
+from apps.scraper.utils.api_fetcher import NEWSAPI_CATEGORIES, iter_newsapi_articles, newsapi_source_url
+from apps.scraper.utils.concurrency import iter_bounded, run_bounded
+from apps.scraper.utils.host_guard import HostUnavailable, guarded_get
+from apps.scraper.utils.html_cache import CACHE_TTL, fetch_html
+from apps.scraper.utils.simhash import simhash
+from apps.scraper.utils.url_index import RunUrlFilter, canonicalize_url, get_seen_url_index
 
 # ---------------------------
 # 1️⃣ SETUP DIRECTORIES & LOGGING
@@ -42,12 +50,22 @@ def load_sources():
 # 3️⃣ FETCH & CLEAN FULL ARTICLES
 # ---------------------------
 
-def fetch_full_article(url):
+def extract_article_text(url, html):
+    """Run newspaper's extractor over HTML we already have."""
+    newspaper_config = NewspaperConfig()
+    newspaper_config.fetch_images = False  # we only keep the text
+    article = NewspaperArticle(url, config=newspaper_config)
+    article.download(input_html=html)
+    article.parse()
+    return article.text.strip()
+
+
+def fetch_full_article(url, timeout=ARTICLE_TIMEOUT, max_age=CACHE_TTL):
     try:
-        article = NewspaperArticle(url)
-        article.download()
-        article.parse()
-        return article.text.strip()
+        # Read through the HTML cache; newspaper only parses what we fetched
+        return extract_article_text(url, fetch_html(url, timeout, max_age=max_age))
+    except HostUnavailable:
+        return None  # breaker open: the caller falls back to the feed summary
     except Exception as e:
         logging.warning(f"Failed to fetch article from {url}: {e}")
         return None
@@ -56,58 +74,211 @@ def fetch_full_article(url):
 # 4️⃣ FETCH ARTICLES FROM RSS & API
 # ---------------------------
 
-def fetch_articles():
+def fetch_feed(url, request_headers=None, timeout=FEED_TIMEOUT):
     """
-    Returns a list of article dicts with keys:
-    title, text, url, source, category, published_at
+    Download one RSS document with a hard timeout and parse it.
+
+    Returns (response, parsed_feed); parsed_feed is None when the server
+    answered 304 Not Modified to our conditional request.
+    """
+    response = guarded_get(url, timeout=timeout, headers=request_headers)
+    if response.status_code == 304:
+        return response, None
+    response.raise_for_status()
+    return response, feedparser.parse(response.content, response_headers=dict(response.headers))
+
+
+def _entry_summary(entry):
+    # Extract summary if available
+    summary = entry.get("summary") or entry.get("description")
+    if not summary and "content" in entry:
+        summary = entry["content"][0].get("value") if entry["content"] else None
+    return clean_text(summary or "")
+
+
+def _collect_feed_entries(feed, feed_state):
+    """
+    Parse one feed and return the unseen entries that need a full-text fetch.
+    Entries seen before under an older updated timestamp come back flagged
+    as revised.
+    """
+    category, source_name, url = feed
+    logging.info(f"Scraping {source_name} ({category})")
+    try:
+        response, parsed_feed = fetch_feed(url, feed_state.request_headers(url))
+    except Exception as e:
+        logging.error(f"Error parsing feed {url}: {e}")
+        feed_state.record_failure(url)
+        return []
+
+    if parsed_feed is None:
+        feed_state.record(url, response)
+        logging.info(f"Feed unchanged since last poll: {url}")
+        return []
+
+    entries = []
+    keys = []
+    for entry in parsed_feed.entries:
+        key = entry_version(entry)
+        keys.append(key)
+        if feed_state.is_seen(url, key):
+            continue
+
+        entries.append({
+            "title": entry.get("title", ""),
+            "url": canonicalize_url(entry.get("link", "")),
+            "source": source_name,
+            "summary": _entry_summary(entry),
+            "category": category,
+            "published_at": entry.get("published", ""),
+            "revised": feed_state.is_known(url, entry_guid(entry)),
+        })
+
+    feed_state.record(url, response, keys)
+    return entries
+
+
+def _build_article(entry):
+    """Download the full text of a feed entry, falling back to its summary."""
+    # A revised entry's page changed after we cached it
+    max_age = 0 if entry.get("revised") else CACHE_TTL
+    return {
+        "title": entry["title"],
+        "text": fetch_full_article(entry["url"], max_age=max_age) or entry["summary"],
+        "extractor": "article",
+        "url": entry["url"],
+        "source": entry["source"],
+        "summary": entry["summary"],
+        "category": entry["category"],
+        "published_at": entry["published_at"]
+    }
+
+
+def iter_articles(feed_state, skip_known=True, only_due=False, feed_urls=None, newsapi_categories=None):
+    """
+    Fetch stage: yields raw article dicts as soon as their page is downloaded.
+
+    Feeds are downloaded in parallel first, then every entry's full page,
+    both on a bounded pool that also caps in-flight requests per host.
+    Feeds are polled conditionally (ETag / Last-Modified) through feed_state
+    and entries whose GUID was already seen on a previous run are skipped,
+    unless the entry's updated timestamp changed since: such revised entries
+    are downloaded again even with skip_known, and the upsert rewrites the
+    stored article only if its content hash changed. With skip_known, other
+    URLs already stored in the database are dropped before any page download. With only_due, feeds and NewsAPI categories whose
+    adaptive next poll time has not come yet are left alone.
+    feed_urls / newsapi_categories restrict the run to those sources
+    (None means all of them, [] none of them).
+    The caller saves feed_state once articles are stored.
     """
-    all_articles = []
     sources = load_sources()
+    feeds = [
+        (category, feed.get("source"), feed.get("url"))
+        for category, category_feeds in sources.items()
+        for feed in category_feeds
+        if (feed_urls is None or feed.get("url") in feed_urls)
+        and (not only_due or feed_state.is_due(feed.get("url")))
+    ]
+
+    parsed = run_bounded(
+        lambda feed: _collect_feed_entries(feed, feed_state),
+        feeds,
+        key=lambda feed: feed[2],
+    )
+    entries = [entry for feed_entries in parsed for entry in feed_entries]
+    logging.info(f"Collected {len(entries)} entries from {len(feeds)} feeds")
+
+    url_filter = RunUrlFilter(get_seen_url_index() if skip_known else None)
+    entries = [entry for entry in entries if url_filter.claim(entry["url"], refetch=entry["revised"])]
+    logging.info(f"{len(entries)} entries left after dropping known URLs")
 
-    for category, feeds in sources.items():
-        logging.info(f"Scraping category: {category}")
-        for feed in feeds:
-            source_name = feed.get("source")
-            url = feed.get("url")
-            try:
-                parsed_feed = feedparser.parse(url)
-                for entry in parsed_feed.entries:
-                    link = entry.get("link", "")
-                     # Extract summary if available
-                    summary = entry.get("summary") or entry.get("description")
-                    if not summary and "content" in entry:
-                        summary = entry["content"][0].get("value") if entry["content"] else None
-                    summary = clean_text(summary or "")
-
-                    text = fetch_full_article(link) or summary
-                    text = clean_text(text)
-                    if not text:
-                        continue
-
-                    article = {
-                        "title": entry.get("title", ""),
-                        "text": text,
-                        "url": link,
-                        "source": source_name,
-                        "summary": summary,
-                        "category": category,
-                        "published_at": entry.get("published", "")
-                    }
-                    all_articles.append(article)
-            except Exception as e:
-                logging.error(f"Error parsing feed {url}: {e}")
+    yield from iter_bounded(_build_article, entries, key=lambda entry: entry["url"])
 
     # Fetch from NewsAPI
-    api_articles = fetch_newsapi_articles()
-    if api_articles:
-        for a in api_articles:
-            text = clean_text(a.get("content", ""))
-            summary = clean_text(a.get("description", ""))  # Use description as summary
-            if not text:
-                continue
-            a["text"] = text
-            a["summary"] = summary
-            all_articles.append(a)
+    categories = [
+        category for category in (NEWSAPI_CATEGORIES if newsapi_categories is None else newsapi_categories)
+        if not only_due or feed_state.is_due(newsapi_source_url(category))
+    ]
+    if categories:
+        yield from iter_newsapi_articles(categories, url_filter=url_filter, feed_state=feed_state)
+
+
+def clean_articles(articles):
+    """Clean stage: strip markup from text and summary, drop empty articles."""
+    for a in articles:
+        text = clean_text(a.get("text") or "")
+        if not text:
+            continue
+        a["text"] = text
+        a["summary"] = clean_text(a.get("summary") or "")
+        yield a
+
+
+def dedupe_articles(articles, simhash_index=None):
+    """
+    Dedupe stage: tag copies of a story so they are stored as part of its
+    cluster instead of being processed on their own.
+
+    An exact copy of a body already seen in this run (under another URL)
+    joins the cluster of that first copy. With a SimHashIndex,
+    near-duplicates (the same wire story reworded) are tagged too. Tags
+    are "duplicate_of" (an Article id) or "duplicate_of_url" (a root from
+    this run). Copies are kept rather than dropped: their feed GUIDs are
+    already marked seen, so they would never be fetched again.
+    """
+    seen = {}  # hash of body -> (url, duplicate_of, duplicate_of_url) of its first copy
+    for a in articles:
+        fingerprint = hash(a["text"])
+        if fingerprint in seen:
+            url, duplicate_of, duplicate_of_url = seen[fingerprint]
+            if url == a.get("url"):
+                continue  # same article twice in one run
+            logging.info(f"Duplicate body: {a.get('url')} is a copy of {url}")
+            if simhash_index is not None:
+                a["simhash"] = simhash(a["text"])
+            if duplicate_of is not None:
+                a["duplicate_of"] = duplicate_of
+            else:
+                a["duplicate_of_url"] = duplicate_of_url or url
+            yield a
+            continue
+
+        if simhash_index is not None:
+            a["simhash"] = simhash(a["text"])
+            if a["simhash"] is not None:
+                root = simhash_index.find(a["simhash"], a["url"])
+                if root is None:
+                    simhash_index.add(a["url"], a["simhash"], a["url"])
+                elif isinstance(root, int):
+                    a["duplicate_of"] = root
+                else:
+                    a["duplicate_of_url"] = root
+        seen[fingerprint] = (a.get("url"), a.get("duplicate_of"), a.get("duplicate_of_url"))
+        yield a
+
+
+def source_urls(feed_urls=None, newsapi_categories=None):
+    """
+    State keys of the polled sources: RSS feed URLs plus one per NewsAPI
+    category, all of them unless restricted like iter_articles().
+    """
+    if feed_urls is None:
+        feed_urls = [feed.get("url") for feeds in load_sources().values() for feed in feeds]
+    if newsapi_categories is None:
+        newsapi_categories = NEWSAPI_CATEGORIES
+    return list(feed_urls) + [newsapi_source_url(category) for category in newsapi_categories]
+
+
+def fetch_articles(skip_known=True):
+    """
+    Returns a list of article dicts with keys:
+    title, text, url, source, category, published_at
+
+    Materializes the whole streaming pipeline; ingestion should consume
+    iter_articles() through apps.scraper.pipeline instead. Nothing is
+    stored, so feed state (validators, seen GUIDs) is left untouched.
+    """
+    all_articles = list(dedupe_articles(clean_articles(iter_articles(MemoryFeedState(), skip_known))))
 
     logging.info(f"Total articles fetched: {len(all_articles)}")
     return all_articles
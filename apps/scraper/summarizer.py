@@ -1,6 +1,24 @@
 import torch
 from transformers import BartForConditionalGeneration, BartTokenizer
 from apps.scraper.models import Article
+from apps.scraper.utils.batching import map_batched, token_lengths
+
+SUMMARY_MODEL = "facebook/bart-large-cnn"
+# BART reads up to 1024 tokens per chunk: ~4 full chunks per generate() call
+SUMMARY_BATCH_TOKENS = 4096
+
+model = None
+tokenizer = None
+
+
+def load_summarizer():
+    """Load BART once, on the first summary request."""
+    global model, tokenizer
+    if model is None:
+        tokenizer = BartTokenizer.from_pretrained(SUMMARY_MODEL)
+        model = BartForConditionalGeneration.from_pretrained(SUMMARY_MODEL).to("cpu")
+        model.eval()
+    return model, tokenizer
 
 
 def chunk_text_chars(text, tokenizer, max_chars=1000):
@@ -21,14 +39,20 @@ def chunk_text_chars(text, tokenizer, max_chars=1000):
 
 def summarize_text(text, model, tokenizer, max_total_chars=400, device="cpu"):
     chunks = chunk_text_chars(text, tokenizer, max_chars=1000)
-    summaries = []
+    if not chunks:
+        return ""
     max_chars_per_chunk = max_total_chars // max(1, len(chunks)) if chunks else 50
     max_tokens_per_chunk = max_chars_per_chunk // 4 + 5
-    for chunk in chunks:
-        inputs = tokenizer(chunk, max_length=1024, truncation=True, return_tensors="pt").to(device)
-        summary_ids = model.generate(**inputs, max_length=max_tokens_per_chunk, num_beams=4, early_stopping=True)
-        summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        summaries.append(summary)
+
+    # Chunks are summarized several at a time, grouped by length
+    def summarize_batch(batch):
+        inputs = tokenizer(batch, max_length=1024, truncation=True, padding=True, return_tensors="pt").to(device)
+        with torch.no_grad():
+            summary_ids = model.generate(**inputs, max_length=max_tokens_per_chunk, num_beams=4, early_stopping=True)
+        return tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+    lengths = token_lengths(tokenizer, chunks, max_length=1024)
+    summaries = map_batched(summarize_batch, chunks, lengths, max_tokens=SUMMARY_BATCH_TOKENS)
     return " ".join(summaries)
 
 
@@ -43,6 +67,7 @@ def summarize_article_by_id(article_id):
         return article.summary
 
     # Generate summary...
+    model, tokenizer = load_summarizer()
     summary = summarize_text(article.text, model, tokenizer)
     article.summary = summary
     article.save()
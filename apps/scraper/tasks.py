@@ -1,175 +1,398 @@
 # tasks.py
-from celery import shared_task
-from django.db import connection
-from .scraper import fetch_articles
-from .models import Article, ArticleEmbedding
-from .utils.embeddings import get_embedding_batch
-from dateutil.parser import parse as parse_date
+from celery import chord, shared_task
+from django.db import OperationalError, connection
+from django.db.models import Max, Value
+from django.db.models.functions import Coalesce, NullIf, Substr
+from .embedding_queue import MAX_BATCH, enqueue_embeddings, pop_batch, start_flush
+from .embedding_versions import build_staging_indexes, building_version, coverage, current_version, encode_for_version, flip, start_version, unstaged_embeddings
+from .models import Article, ArticleEmbedding, ArticleEmbeddingStaging
+from .persistence import compute_content_hash, link_near_duplicates
+from .pipeline import due_sources, run_ingest
+from .scraper import extract_article_text
+from .utils.api_fetcher import extract_paragraph_text
+from .utils.cleaner import clean_text
+from .utils.html_cache import html_cache
+from .utils.embeddings import MODEL_NAME
+from .utils.redis_client import redis_lock
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, time_limit=900, soft_time_limit=840)
+SCRAPE_TOTAL_KEYS = ("new", "updated", "unchanged", "failed", "total")
+
+
+@shared_task(bind=True, time_limit=300)
 def scrape_news_fast(self):
-    """Scrape articles - fast, no embeddings"""
+    """Scrape articles - fast, no embeddings: one subtask per due source, fanned out across workers"""
     logger.info("=== Starting fast news scraping ===")
     
     try:
-        articles = fetch_articles()
-        logger.info(f"📥 Fetched {len(articles)} articles")
-    except Exception as e:
-        logger.error(f"❌ Failed: {e}", exc_info=True)
-        raise
+        feed_urls, categories = due_sources()
+        since_id = Article.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+    finally:
+        connection.close()
     
-    if not articles:
-        return {"new": 0, "updated": 0}
+    header = [scrape_source.s(feed_urls=[url]) for url in feed_urls]
+    header += [scrape_source.s(newsapi_categories=[category]) for category in categories]
+    if not header:
+        logger.info("ℹ️ No source is due yet")
+        return {"dispatched": 0}
     
-    saved_count = 0
-    updated_count = 0
+    # The callback runs once every source has finished, on whichever worker is free
+    result = chord(header)(aggregate_scrape_results.s(since_id=since_id))
+    logger.info(f"🚀 Dispatched {len(feed_urls)} feeds and {len(categories)} NewsAPI categories")
     
-    for i, a in enumerate(articles, start=1):
-        title = a.get("title") or "[No title]"
-        url = a.get("url")
-        text = a.get("text") or ""
-        category = a.get("category") or ""
-        source = a.get("source") or ""
-        summary = a.get("summary") or text[:300]
-        published_at_raw = a.get("published_at")
-        
-        published_at = None
-        if published_at_raw:
-            try:
-                published_at = parse_date(published_at_raw)
-            except Exception:
-                pass
-        
-        if not url:
-            continue
-        
+    return {"dispatched": len(header), "chord_id": result.id}
+
+
+@shared_task(bind=True, time_limit=900, soft_time_limit=840)
+def scrape_source(self, feed_urls=None, newsapi_categories=None):
+    """Scrape and store the given feeds / NewsAPI categories (one chord member)"""
+    feed_urls = feed_urls or []
+    newsapi_categories = newsapi_categories or []
+    label = ", ".join(feed_urls + newsapi_categories)
+    totals = dict.fromkeys(SCRAPE_TOTAL_KEYS, 0)
+    
+    # A source still being scraped by the previous run is skipped, not doubled
+    with redis_lock(f"scraper:source-lock:{label}", ttl=900) as acquired:
+        if not acquired:
+            logger.info(f"⏭️ {label} is already being scraped")
+            return totals
         try:
-            obj, created = Article.objects.update_or_create(
-                url=url,
-                defaults={
-                    "title": title,
-                    "text": text,
-                    "category": category,
-                    "source": source,
-                    "summary": summary,
-                    "published_at": published_at,
-                    "status": "pending",
-                }
-            )
-            
-            if created:
-                saved_count += 1
-                logger.info(f"[{i}] ✅ NEW: {title[:60]}")
-            else:
-                updated_count += 1
-        
+            totals.update(run_ingest(feed_urls=feed_urls, newsapi_categories=newsapi_categories))
         except Exception as e:
-            logger.error(f"[{i}] ❌ Error: {e}")
+            # Never fail the chord over one source: the others still get counted
+            logger.error(f"❌ Failed to scrape {label}: {e}", exc_info=True)
+            totals["error"] = str(e)
+        finally:
+            connection.close()
     
-    connection.close()
+    return totals
+
+
+@shared_task(bind=True)
+def aggregate_scrape_results(self, results, since_id=0):
+    """Chord callback: add up the per-source totals and link cross-source duplicates"""
+    totals = dict.fromkeys(SCRAPE_TOTAL_KEYS, 0)
+    for result in results:
+        for key in SCRAPE_TOTAL_KEYS:
+            totals[key] += result.get(key, 0)
+    totals["sources"] = len(results)
+    totals["errors"] = sum(1 for result in results if result.get("error"))
+    
+    try:
+        totals["linked_duplicates"] = link_near_duplicates(since_id)
+    finally:
+        connection.close()
     
-    logger.info(f"✅ Scraping complete: {saved_count} new, {updated_count} updated")
+    logger.info(
+        f"✅ Scraping complete: {totals['new']} new, {totals['updated']} updated, "
+        f"{totals['unchanged']} unchanged from {totals['sources']} sources ({totals['errors']} failed)"
+    )
     
-    return {
-        "new": saved_count,
-        "updated": updated_count,
-        "total": len(articles)
-    }
+    return totals
 
 
-@shared_task(bind=True, time_limit=1800)
-def generate_embeddings(self, batch_size=100):
-    logger.info("=== Starting embedding generation ===")
+# Article.extractor -> function(url, html) that produced its text
+REEXTRACTORS = {
+    "article": extract_article_text,
+    "paragraphs": lambda url, html: extract_paragraph_text(html),
+}
+
+
+@shared_task(bind=True, time_limit=3600)
+def reextract_articles(self, chunk_size=200):
+    """
+    Re-run text extraction over the cached HTML of stored articles - no network.
+    Use after changing extract_article_text or clean_text. Each row goes
+    through the extractor it was scraped with (rows without one are
+    skipped and counted as unknown_extractor).
+    """
+    logger.info("=== Starting re-extraction from HTML cache ===")
+    
+    totals = {"reextracted": 0, "unchanged": 0, "missing": 0, "unknown_extractor": 0}
+    last_id = 0
     
     try:
-        # Force queryset evaluation
-        articles_without_embeddings = list(
-            Article.objects.filter(embedding_data__isnull=True)
-        )[:batch_size]
-
-        count = len(articles_without_embeddings)
-        if count == 0:
-            logger.info("✅ All articles have embeddings")
-            return {"processed": 0}
-        
-        logger.info(f"📝 Found {count} articles needing embeddings")
+        while True:
+            chunk = list(
+                Article.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "url", "title", "text", "summary", "duplicate_of_id", "extractor")[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            
+            changed = []
+            for article in chunk:
+                extract = REEXTRACTORS.get(article.extractor)
+                if extract is None:
+                    totals["unknown_extractor"] += 1
+                    continue
+                html = html_cache.get(article.url)
+                if html is None:
+                    totals["missing"] += 1
+                    continue
+                try:
+                    text = clean_text(extract(article.url, html))
+                except Exception as e:
+                    logger.warning(f"Re-extraction failed for {article.url}: {e}")
+                    totals["missing"] += 1
+                    continue
+                if not text or text == article.text:
+                    totals["unchanged"] += 1
+                    continue
+                
+                article.text = text
+                article.content_hash = compute_content_hash(article.title, text, article.summary)
+                article.status = "duplicate" if article.duplicate_of_id else "pending"
+                changed.append(article)
+            
+            if changed:
+                Article.objects.bulk_update(changed, ["text", "content_hash", "status"])
+                ArticleEmbedding.objects.filter(article__in=changed).delete()
+                ArticleEmbeddingStaging.objects.filter(article__in=changed).delete()
+                enqueue_embeddings([article.id for article in changed if not article.duplicate_of_id])
+                totals["reextracted"] += len(changed)
+                logger.info(f"✅ Re-extracted {len(changed)} articles (up to id {last_id})")
+    finally:
+        connection.close()
+    
+    logger.info(f"✅ Re-extraction complete: {totals}")
+    return totals
+
+
+# Characters of summary/text sent to the encoder (~512 tokens)
+EMBED_TEXT_CHARS = 2500
+# Seconds a backlog drain may run; stays under the task's time_limit
+EMBED_TIME_BUDGET = int(os.getenv("EMBED_TIME_BUDGET", "1500"))
+
+
+def _embed_text_rows(articles):
+    """(id, text to embed) of articles - never the full row"""
+    return articles.annotate(
+        embed_text=Substr(Coalesce(NullIf("summary", Value("")), "text"), 1, EMBED_TEXT_CHARS)
+    ).values_list("id", "embed_text")
+
+
+def _unembedded_rows():
+    """(id, text to embed) of cluster roots without an embedding"""
+    return _embed_text_rows(Article.objects.filter(embedding_data__isnull=True, duplicate_of__isnull=True))
+
+
+def _embed_rows(rows, chunk_size=50, version=None, model=ArticleEmbedding):
+    """
+    Encode (id, text) rows with version (the active one by default) and
+    upsert them into model, one statement per chunk; returns how many were saved
+    """
+    version = version or current_version()
+    rows = [(article_id, text) for article_id, text in rows if text and len(text.strip()) >= 50]
+    if not rows:
+        logger.info("No valid texts")
+        return 0
+
+    processed = 0
+
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+
+        logger.info(f"Processing chunk {i//chunk_size + 1} ({len(chunk)} articles)...")
         
-        # Collect texts
-        texts_to_embed = []
-        valid_articles = []
+        try:
+            embeddings = encode_for_version(version, [text for _, text in chunk])
+            if not embeddings or len(embeddings) != len(chunk):
+                logger.error(f"Embedding mismatch")
+                continue
+            
+            model.objects.bulk_create(
+                [
+                    model(article_id=article_id, embedding=emb, model_version=version.name)
+                    for (article_id, _), emb in zip(chunk, embeddings)
+                ],
+                update_conflicts=True,
+                unique_fields=["article"],
+                update_fields=["embedding", "model_version", "generated_at"],
+            )
+            processed += len(chunk)
 
-        for article in articles_without_embeddings:
-            text = article.summary or article.text
-            if text and len(text.strip()) >= 50:
-                texts_to_embed.append(text)
-                valid_articles.append(article)
+            logger.info(f"✅ Chunk complete: {len(embeddings)} saved")
 
-        if not texts_to_embed:
-            logger.info("No valid texts")
-            return {"processed": 0}
+        except Exception as e:
+            logger.error(f"❌ Chunk failed: {e}", exc_info=True)
+            continue
 
-        # Process in chunks
-        chunk_size = 50
-        processed = 0
+    return processed
 
-        for i in range(0, len(texts_to_embed), chunk_size):
-            chunk_texts = texts_to_embed[i:i + chunk_size]
-            chunk_articles = valid_articles[i:i + chunk_size]
 
-            logger.info(f"Processing chunk {i//chunk_size + 1} ({len(chunk_texts)} articles)...")
+@shared_task(bind=True, time_limit=300)
+def embed_pending_articles(self):
+    """Embed the articles ingestion just queued - scheduled once per micro-batch window"""
+    start_flush()
+    processed = 0
+    
+    try:
+        while True:
+            ids = pop_batch(MAX_BATCH)
+            if not ids:
+                break
             
-            try:
-                embeddings = get_embedding_batch(chunk_texts)
-                if not embeddings or len(embeddings) != len(chunk_texts):
-                    logger.error(f"Embedding mismatch")
-                    continue
-                
-                # Use update_or_create to avoid conflicts
-                for article, emb in zip(chunk_articles, embeddings):
-                    ArticleEmbedding.objects.update_or_create(
-                        article=article,
-                        defaults={"embedding": emb}
-                    )
-                    processed += 1
-
-                logger.info(f"✅ Chunk complete: {len(embeddings)} saved")
-
-            except Exception as e:
-                logger.error(f"❌ Chunk failed: {e}", exc_info=True)
-                continue
-        
+            # Skip what the sweep or an earlier flush already embedded
+            rows = list(_unembedded_rows().filter(id__in=ids))
+            logger.info(f"📝 Embedding {len(rows)} queued articles")
+            processed += _embed_rows(rows, chunk_size=MAX_BATCH)
+    finally:
         connection.close()
-        remaining = Article.objects.filter(embedding_data__isnull=True).count()
+    
+    logger.info(f"✅ Embedded {processed} queued articles")
+    return {"processed": processed}
+
+
+@shared_task(bind=True, time_limit=1800)
+def generate_embeddings(self, batch_size=MAX_BATCH, time_budget=EMBED_TIME_BUDGET):
+    """
+    Drain the embedding backlog (whatever the queue missed, or a backfill):
+    pages through un-embedded articles by id, batch_size at a time, until
+    none are left or time_budget seconds have passed.
+    """
+    logger.info("=== Starting embedding generation ===")
+    
+    deadline = time.monotonic() + time_budget
+    processed = 0
+    last_id = 0
+    
+    try:
+        while time.monotonic() < deadline:
+            rows = list(_unembedded_rows().filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            logger.info(f"📝 Found {len(rows)} articles needing embeddings (after id {last_id})")
+            processed += _embed_rows(rows, chunk_size=batch_size)
+        
+        remaining = _unembedded_rows().count()
         logger.info(f"✅ Processed {processed} embeddings, {remaining} remaining")
         return {"processed": processed, "remaining": remaining}
 
     except Exception as e:
         logger.error(f"❌ Failed: {e}", exc_info=True)
-        connection.close()
         raise
+    finally:
+        connection.close()
+
+
+
+# Articles per second a re-embedding run may encode, so it never starves
+# live ingestion of encoder time
+REEMBED_RATE = float(os.getenv("REEMBED_RATE", "20"))
+REEMBED_LOCK_KEY = "scraper:embed:reembed"
+
+
+@shared_task
+def start_reembedding(name, model_name=None, normalized=True):
+    """Register a new embedding version and start re-embedding the archive with it"""
+    version = start_version(name, model_name or MODEL_NAME, normalized=normalized)
+    reembed_articles.delay()
+    logger.info(f"🔄 Re-embedding started for {version.name} ({version.model_name}, normalized={version.normalized})")
+    return {"version": version.name}
+
+
+@shared_task(bind=True, time_limit=1800)
+def reembed_articles(self, batch_size=64, rate=REEMBED_RATE, time_budget=EMBED_TIME_BUDGET):
+    """
+    Fill the version being built (if any) into ArticleEmbeddingStaging at
+    no more than rate articles/second, resuming where the last run stopped.
+    Reads keep using the active version meanwhile; once every embedding
+    has a staged counterpart flip_embeddings swaps the new version in.
+    """
+    version = building_version()
+    if version is None:
+        return {"status": "idle"}
+    
+    processed = 0
+    try:
+        with redis_lock(REEMBED_LOCK_KEY, ttl=time_budget + 300) as acquired:
+            if not acquired:
+                logger.info("⏭️ Re-embedding already running")
+                return {"status": "locked"}
+            
+            deadline = time.monotonic() + time_budget
+            last_id = 0
+            while time.monotonic() < deadline:
+                pending = unstaged_embeddings(version).filter(article_id__gt=last_id).order_by("article_id")
+                ids = list(pending.values_list("article_id", flat=True)[:batch_size])
+                if not ids:
+                    break
+                last_id = ids[-1]
+                
+                started = time.monotonic()
+                rows = list(_embed_text_rows(Article.objects.filter(id__in=ids)))
+                processed += _embed_rows(rows, chunk_size=batch_size, version=version, model=ArticleEmbeddingStaging)
+                # Throttle: sleep off whatever this batch finished ahead of the rate
+                time.sleep(max(0.0, len(ids) / rate - (time.monotonic() - started)))
+            
+            staged, total = coverage(version)
+            logger.info(f"🔄 {version.name}: re-embedded {processed} articles, {staged}/{total} covered")
+    finally:
+        connection.close()
+    
+    # Outside the lock, which flip_embeddings takes as well
+    if staged == total:
+        flip_embeddings.delay()
+    return {"status": "flipping" if staged == total else "building", "processed": processed, "staged": staged, "total": total}
 
 
+@shared_task(bind=True, max_retries=5)
+def flip_embeddings(self):
+    """
+    Swap the fully re-embedded version in (embedding_versions.flip), once
+    the on-demand indexes have been built on the staging table. No time
+    limit: a flip killed halfway is only rolled back. Retried while the
+    embedding tables are too busy to lock.
+    """
+    version = building_version()
+    if version is None:
+        return {"status": "idle"}
+    
+    try:
+        with redis_lock(REEMBED_LOCK_KEY, ttl=3600) as acquired:
+            if not acquired:
+                logger.info("⏭️ Re-embedding still running, it schedules the flip when done")
+                return {"status": "locked"}
+            # Slow (CREATE INDEX CONCURRENTLY), so before the tables get locked
+            build_staging_indexes()
+            flipped = flip(version)
+    except OperationalError as e:
+        logger.warning(f"⏳ {version.name}: embedding tables busy, retrying the flip: {e}")
+        raise self.retry(exc=e, countdown=60)
+    finally:
+        connection.close()
+    
+    # Not flipped: articles embedded since the last coverage check, reembed_articles catches up
+    return {"status": "flipped" if flipped else "building", "version": version.name}
 
 
 @shared_task
-def search_similar_articles(query_text, k=10):
+def search_similar_articles(query_text, k=10, ef_search=None):
     """Search for similar articles using embeddings"""
-    from .utils.embeddings import get_embedding
+    from .embedding_versions import encode_query
+    from .vector_search import nearest_embeddings
     
-    # Generate embedding for query
-    query_embedding = get_embedding(query_text)
+    # Generate embedding for query, with the encoder of the stored vectors
+    query_embedding = encode_query(query_text)
     
     if not query_embedding:
         return []
     
-    # Use pgvector's similarity search (cosine distance)
-    similar = ArticleEmbedding.objects.order_by(
-        ArticleEmbedding.embedding.cosine_distance(query_embedding)
-    )[:k]
+    # Use pgvector's similarity search (cosine distance, HNSW index)
+    try:
+        similar = nearest_embeddings(query_embedding, k=k, ef_search=ef_search)
+    finally:
+        connection.close()
     
     results = []
     for emb_obj in similar:
@@ -179,7 +402,8 @@ def search_similar_articles(query_text, k=10):
             "title": article.title,
             "url": article.url,
             "source": article.source,
-            "summary": article.summary[:200],
+            "summary": (article.summary or "")[:200],
+            "distance": float(emb_obj.distance),
         })
     
     return results
\ No newline at end of file
@@ -1,45 +1,92 @@
 import os
-import requests
 from datetime import datetime
 from bs4 import BeautifulSoup
+from apps.scraper.config import ARTICLE_TIMEOUT
 from apps.scraper.utils.cleaner import clean_text
+from apps.scraper.utils.concurrency import iter_bounded
+from apps.scraper.utils.host_guard import FAILURE_STATUSES, guarded_get
+from apps.scraper.utils.html_cache import fetch_html
+from apps.scraper.utils.url_index import canonicalize_url
 from dotenv import load_dotenv
 
 # load_dotenv(dotenv_path="apps/scraper/.env")
 
 NEWSAPI_KEY = os.getenv("NEWS_API_KEY")
 NEWSAPI_ENDPOINT = "https://newsapi.org/v2/top-headlines"
+NEWSAPI_CATEGORIES = ["politics", "technology", "health", "sports"]
+# NewsAPI answers 429 when our API key is out of quota: not a sign newsapi.org is down
+NEWSAPI_FAILURE_STATUSES = FAILURE_STATUSES - {429}
 
 
-def fetch_full_article_text(url):
-    """Fetch and extract full article text from a URL."""
+def newsapi_source_url(category):
+    """Key of a NewsAPI category in the per-source FeedState table."""
+    return f"{NEWSAPI_ENDPOINT}?category={category}"
+
+
+def extract_paragraph_text(html):
+    """Join the text of every <p> of a page (None when there is too little)."""
+    soup = BeautifulSoup(html, "html.parser")
+    paragraphs = soup.find_all("p")
+    text = " ".join([p.get_text(strip=True) for p in paragraphs])
+    return clean_text(text) if len(text) > 200 else None
+
+
+def fetch_full_article_text(url, timeout=ARTICLE_TIMEOUT):
+    """Fetch (through the HTML cache) and extract full article text from a URL."""
     try:
-        response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-        if response.status_code != 200:
-            return None
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        paragraphs = soup.find_all("p")
-        text = " ".join([p.get_text(strip=True) for p in paragraphs])
-        return clean_text(text) if len(text) > 200 else None
+        return extract_paragraph_text(fetch_html(url, timeout))
     except Exception:
         return None
 
 
-def fetch_newsapi_articles(categories=None, language="en"):
-    """Fetch articles from NewsAPI + scrape full text and summary"""
+def _build_newsapi_article(item, category):
+    """Download the full page of a NewsAPI item, falling back to its summary."""
+    url = item.get("url")
+    title = clean_text(item.get("title", ""))
+    source = item.get("source", {}).get("name", "Unknown")
+
+    # Summary first
+    summary = clean_text(item.get("description", "") or item.get("content", ""))
+
+    # Then full article
+    full_content = fetch_full_article_text(url)
+    if not full_content:
+        full_content = summary
+    if not full_content:
+        return None
+
+    return {
+        "source": source,
+        "title": title,
+        "summary": summary or "",  # new field
+        "content": full_content,
+        "text": full_content,  # for consistency
+        "extractor": "paragraphs",
+        "url": url,
+        "published_at": item.get("publishedAt", datetime.utcnow().isoformat()),
+        "category": category
+    }
+
+
+def iter_newsapi_articles(categories=None, language="en", url_filter=None, feed_state=None):
+    """
+    Yield articles from NewsAPI + scraped full text and summary, one at a time
+    as their page download finishes.
+
+    url_filter (a RunUrlFilter) drops known URLs before their page is downloaded.
+    feed_state (a FeedStateStore) learns how many new items each category yields.
+    """
     from logging import getLogger
     logger = getLogger(__name__)
 
     if categories is None:
-        categories = ["politics", "technology", "health", "sports"]
-
-    articles = []
+        categories = NEWSAPI_CATEGORIES
 
     if not NEWSAPI_KEY:
         logger.error("❌ NEWSAPI_KEY not found in environment variables.")
-        return articles
+        return
 
+    collected = 0
     for category in categories:
         params = {
             "apiKey": NEWSAPI_KEY,
@@ -50,45 +97,48 @@ def fetch_newsapi_articles(categories=None, language="en"):
         logger.info(f"🔍 Fetching {category} news from NewsAPI...")
 
         try:
-            response = requests.get(NEWSAPI_ENDPOINT, params=params)
+            response = guarded_get(
+                NEWSAPI_ENDPOINT, params=params, timeout=ARTICLE_TIMEOUT, failure_statuses=NEWSAPI_FAILURE_STATUSES
+            )
             if response.status_code != 200:
                 logger.warning(f"⚠️ NewsAPI returned status {response.status_code} for category '{category}'.")
+                if feed_state is not None:
+                    feed_state.record_failure(newsapi_source_url(category))
                 continue
 
             data = response.json()
             if not data.get("articles"):
                 logger.info(f"ℹ️ No articles found for {category}.")
+                if feed_state is not None:
+                    feed_state.schedule(newsapi_source_url(category), 0)
                 continue
 
+            items = []
             for item in data["articles"]:
-                url = item.get("url")
-                title = clean_text(item.get("title", ""))
-                source = item.get("source", {}).get("name", "Unknown")
-
-                # Summary first
-                summary = clean_text(item.get("description", "") or item.get("content", ""))
-
-                # Then full article
-                full_content = fetch_full_article_text(url)
-                if not full_content:
-                    full_content = summary
-                if not full_content:
+                item["url"] = canonicalize_url(item.get("url"))
+                if url_filter is not None and not url_filter.claim(item["url"]):
                     continue
+                items.append(item)
 
-                articles.append({
-                    "source": source,
-                    "title": title,
-                    "summary": summary or "",  # new field
-                    "content": full_content,
-                    "text": full_content,  # for consistency
-                    "url": url,
-                    "published_at": item.get("publishedAt", datetime.utcnow().isoformat()),
-                    "category": category
-                })
+            if feed_state is not None:
+                feed_state.schedule(newsapi_source_url(category), len(items))
 
-            logger.info(f"✅ Collected {len(articles)} total articles so far (category: {category})")
+            # Full pages are downloaded concurrently and handed on as they finish
+            for article in iter_bounded(
+                lambda item: _build_newsapi_article(item, category),
+                items,
+                key=lambda item: item["url"],
+            ):
+                if article:
+                    collected += 1
+                    yield article
+
+            logger.info(f"✅ Collected {collected} total articles so far (category: {category})")
 
         except Exception as e:
             logger.error(f"❌ Error fetching {category} news: {e}")
 
-    return articles
+
+def fetch_newsapi_articles(categories=None, language="en", url_filter=None):
+    """Fetch articles from NewsAPI + scrape full text and summary"""
+    return list(iter_newsapi_articles(categories, language, url_filter))
@@ -0,0 +1,65 @@
+# apps/scraper/utils/batching.py
+"""
+Length-bucketed batching for transformer inference.
+
+A padded batch costs (batch size x longest sequence), so mixing short RSS
+summaries with full articles wastes most of the compute on padding. Here
+texts are sorted by token length, cut into batches whose padded size stays
+under a token budget (short texts get big batches, long texts small ones),
+and results are put back in the caller's order.
+"""
+
+import os
+
+MAX_TOKENS = int(os.getenv("INFERENCE_BATCH_TOKENS", "8192"))  # padded tokens per batch
+MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "128"))       # texts per batch, whatever their length
+
+
+def token_lengths(tokenizer, texts, max_length=None):
+    """Token counts (special tokens included) from a Hugging Face tokenizer."""
+    encoded = tokenizer(
+        list(texts),
+        add_special_tokens=True,
+        truncation=max_length is not None,
+        max_length=max_length,
+    )["input_ids"]
+    return [len(ids) for ids in encoded]
+
+
+def plan_batches(lengths, max_tokens=MAX_TOKENS, max_batch=MAX_BATCH):
+    """
+    Split indices 0..len(lengths)-1 into batches of similar length.
+
+    Longest texts come first, so running out of memory shows up on the
+    first batch rather than the last. A text longer than max_tokens on its
+    own still gets a batch of one.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+
+    batches = []
+    current = []
+    longest = 0
+    for index in order:
+        length = max(1, lengths[index])
+        padded = max(longest, length) * (len(current) + 1)
+        if current and (len(current) >= max_batch or padded > max_tokens):
+            batches.append(current)
+            current, longest = [], 0
+        current.append(index)
+        longest = max(longest, length)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def map_batched(func, items, lengths, max_tokens=MAX_TOKENS, max_batch=MAX_BATCH):
+    """
+    Run func(list_of_items) over length-bucketed batches; func returns one
+    result per item (list or array rows). Results come back in input order.
+    """
+    results = [None] * len(items)
+    for batch in plan_batches(lengths, max_tokens, max_batch):
+        outputs = func([items[i] for i in batch])
+        for index, output in zip(batch, outputs):
+            results[index] = output
+    return results
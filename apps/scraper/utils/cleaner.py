@@ -1,9 +1,58 @@
 from bs4 import BeautifulSoup
+import html
 import re
 
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml is optional, BeautifulSoup handles everything without it
+    lxml = None
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# BeautifulSoup's get_text() leaves these out as well
+_NON_TEXT_TAGS = ("script", "style", "template")
+# lxml drops CDATA sections and, for whole documents, the <head> text
+# (e.g. <title>) that BeautifulSoup keeps, and returns the markup inside
+# raw-text elements (<textarea><b>x</b>) as text: leave those to the soup
+_SOUP_ONLY_RE = re.compile(
+    r"<!\[CDATA\[|<(?:html|textarea|title|xmp|iframe|noembed|noframes|plaintext)[\s/>]", re.IGNORECASE
+)
+
+
+def _needs_soup(text: str) -> bool:
+    # A "<" after the last ">" is cut-off markup (a summary truncated
+    # mid-tag): lxml drops it, the soup keeps it as text
+    return text.rfind("<") > text.rfind(">") or _SOUP_ONLY_RE.search(text) is not None
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _soup_text(text: str) -> str:
+    soup = BeautifulSoup(text, "html.parser")
+    return soup.get_text(separator=" ")
+
+
+def _lxml_text(text: str) -> str:
+    root = lxml.html.fragment_fromstring(text, create_parent="div")
+    etree.strip_elements(root, *_NON_TEXT_TAGS, with_tail=False)
+    return " ".join(root.itertext())
+
+
 def clean_text(text: str) -> str:
     """Remove HTML tags, scripts, and normalize whitespace"""
-    soup = BeautifulSoup(text, "html.parser")
-    cleaned = soup.get_text(separator=" ")
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
+    if not text:
+        return ""
+
+    # Most feed summaries and extracted bodies are already plain text
+    if "<" not in text:
+        return _normalize(html.unescape(text) if "&" in text else text)
+
+    if lxml is not None and not _needs_soup(text):
+        try:
+            return _normalize(_lxml_text(text))
+        except (ValueError, etree.ParserError):
+            pass  # e.g. control characters lxml refuses: use the slow path
+
+    return _normalize(_soup_text(text))
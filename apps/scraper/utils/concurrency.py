@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from apps.scraper.config import MAX_PER_HOST, MAX_WORKERS
+
+
+def host_of(url):
+    """Return the lowercase host of a URL ('' if it has none)."""
+    return (urlparse(url or "").hostname or "").lower()
+
+
+class HostLimiter:
+    """Caps the number of in-flight requests sent to a single host."""
+
+    def __init__(self, per_host=MAX_PER_HOST):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, url):
+        with self._semaphore(host_of(url)):
+            yield
+
+
+# Shared by every fetcher so the per-host cap holds across RSS and NewsAPI
+host_limiter = HostLimiter()
+
+
+def _interleave_by_host(indexed_items, key):
+    """Round-robin items across hosts so one busy host doesn't pin every worker."""
+    buckets = OrderedDict()
+    for index, item in indexed_items:
+        buckets.setdefault(host_of(key(item)), []).append((index, item))
+
+    queues = [iter(bucket) for bucket in buckets.values()]
+    while queues:
+        still_open = []
+        for queue in queues:
+            nxt = next(queue, None)
+            if nxt is not None:
+                yield nxt
+                still_open.append(queue)
+        queues = still_open
+
+
+def run_bounded(func, items, key, max_workers=MAX_WORKERS):
+    """
+    Run func(item) for every item on a bounded thread pool.
+
+    key(item) must return the URL the item will hit; it is used to spread
+    work across hosts. Results come back in the same order as items.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    results = [None] * len(items)
+    scheduled = list(_interleave_by_host(enumerate(items), key))
+
+    def call(indexed):
+        index, item = indexed
+        return index, func(item)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        for index, result in pool.map(call, scheduled):
+            results[index] = result
+
+    return results
+
+
+def iter_bounded(func, items, key, max_workers=MAX_WORKERS, max_pending=None):
+    """
+    Streaming variant of run_bounded: yields func(item) as soon as each call
+    finishes (completion order), with at most max_pending calls in flight so
+    finished results never pile up in memory.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    max_workers = max(1, min(max_workers, len(items)))
+    max_pending = max_pending or 2 * max_workers
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for _, item in _interleave_by_host(enumerate(items), key):
+            pending.add(pool.submit(func, item))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        for future in as_completed(pending):
+            yield future.result()
+
@@ -1,51 +1,139 @@
 # scraper/utils/embeddings.py
+"""
+The one sentence-embedding API of the project (all-MiniLM-L6-v2, 384 dims).
 
-from sentence_transformers import SentenceTransformer
+With EMBEDDING_SERVICE_URL set, texts are encoded by the shared embedding
+service (python -m apps.scraper.embedding_service), which holds the only
+copy of the model and batches concurrent calls together. Without it the
+model is loaded in this process, on first use: the PyTorch fp32 model,
+or with EMBEDDING_BACKEND=onnx the int8 ONNX Runtime export (see
+onnx_encoder.py), which falls back to PyTorch if it is missing.
+"""
+
+import base64
 import logging
+import os
+import threading
+
 import numpy as np
 
+from apps.scraper.utils.batching import MAX_BATCH, map_batched, token_lengths
+
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "all-MiniLM-L6-v2"
+DIMENSIONS = 384
+MAX_CHARS = 2500  # 512 tokens ≈ 2000-2500 chars
+BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()  # "torch" or "onnx"
+SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "").rstrip("/")
+SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "60"))
+
 # ---------------------------
-# 1️⃣ Initialize BERT Model
+# 1️⃣ Model / service backends
 # ---------------------------
-try:
-    bert_model = SentenceTransformer('all-MiniLM-L6-v2')
-    logger.info("✅ BERT embedding model loaded successfully.")
-except Exception as e:
-    bert_model = None
-    logger.error(f"❌ Failed to load BERT embedding model: {e}")
+
+bert_model = None
+active_backend = None
+_model_error = None
+_model_lock = threading.Lock()
+
+
+def _load_onnx():
+    try:
+        from apps.scraper.utils.onnx_encoder import load_onnx_encoder
+        encoder = load_onnx_encoder()
+        logger.info("✅ int8 ONNX embedding model loaded successfully.")
+        return encoder
+    except Exception as e:
+        logger.error(f"❌ ONNX backend unavailable, using PyTorch: {e}")
+        return None
+
+
+def load_model():
+    """The in-process encoder, loaded once (None if it failed)."""
+    global bert_model, active_backend, _model_error
+    if bert_model is None and _model_error is None:
+        with _model_lock:
+            if bert_model is None and _model_error is None:
+                if BACKEND == "onnx":
+                    bert_model = _load_onnx()
+                    if bert_model is not None:
+                        active_backend = "onnx-int8"
+                        return bert_model
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    bert_model = SentenceTransformer(MODEL_NAME)
+                    active_backend = "torch"
+                    logger.info("✅ BERT embedding model loaded successfully.")
+                except Exception as e:
+                    _model_error = str(e)
+                    logger.error(f"❌ Failed to load BERT embedding model: {e}")
+    return bert_model
+
+
+def encode_local(texts, normalize=False, max_batch=MAX_BATCH):
+    """
+    Encode with the in-process model: float32 array of shape (len(texts), 384).
+    Texts are grouped into length buckets under a token budget (see batching.py).
+    """
+    model = load_model()
+    if model is None:
+        raise RuntimeError(f"BERT model not loaded: {_model_error}")
+    if active_backend != "torch":  # OnnxEncoder buckets by token length itself
+        return model.encode(texts, batch_size=max_batch, normalize_embeddings=normalize)
+
+    lengths = token_lengths(model.tokenizer, texts, max_length=model.max_seq_length)
+    rows = map_batched(
+        lambda batch: model.encode(
+            batch,
+            batch_size=len(batch),
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize,
+        ),
+        texts,
+        lengths,
+        max_batch=max_batch,
+    )
+    return np.vstack(rows).astype(np.float32, copy=False)
+
+
+def encode_remote(texts, normalize=False):
+    """Encode through the embedding service: float32 array of shape (len(texts), 384)."""
+    from apps.scraper.utils import http_client
+
+    response = http_client.post(
+        f"{SERVICE_URL}/encode",
+        json={"texts": texts, "normalize": normalize},
+        timeout=SERVICE_TIMEOUT,
+    )
+    response.raise_for_status()
+    payload = response.json()
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype=np.float32).reshape(payload["shape"])
+
+
+def _encode(texts, normalize):
+    if SERVICE_URL:
+        return encode_remote(texts, normalize)
+    return encode_local(texts, normalize)
 
 # ---------------------------
 # 2️⃣ Single embedding helper (KEEP FOR COMPATIBILITY)
 # ---------------------------
 
-def get_embedding(text: str):
+def get_embedding(text: str, normalize: bool = False):
     """
     Encode a text string into a BERT embedding (list of floats).
-    Returns None if the model is not loaded or text is invalid.
-    
+    Returns None if the encoder is unavailable or text is invalid.
+
     NOTE: For processing multiple texts, use get_embedding_batch() instead - it's 5-10x faster.
     """
-    if bert_model is None:
-        logger.warning("BERT model not loaded, returning None.")
-        return None
-    
     if not text or not text.strip():
         logger.warning("Empty text provided for embedding")
         return None
-    
+
     try:
-        # Truncate to prevent token limit issues (512 tokens ≈ 2000-2500 chars)
-        text = text[:2500]
-        
-        embedding = bert_model.encode(
-            text, 
-            show_progress_bar=False,
-            convert_to_numpy=True
-        )
-        return embedding.tolist()  # convert to list for pgvector
-        
+        return _encode([text[:MAX_CHARS]], normalize)[0].tolist()  # convert to list for pgvector
     except Exception as e:
         logger.error(f"Failed to encode text: {e}", exc_info=True)
         return None
@@ -55,70 +143,48 @@ def get_embedding(text: str):
 # 3️⃣ CRITICAL: Batch embedding helper
 # ---------------------------
 
-def get_embedding_batch(texts: list):
+def get_embedding_batch(texts: list, normalize: bool = False):
     """
     Encode multiple texts into embeddings in ONE batch operation.
-    
-    THIS IS THE KEY OPTIMIZATION:
-    - Processing 50 texts individually: ~50 seconds
-    - Processing 50 texts in batch: ~5-8 seconds
-    - 5-10x speed improvement!
-    
+
     Args:
         texts: List of text strings to encode
-        
+        normalize: L2-normalize the vectors (cosine similarity = dot product)
+
     Returns:
-        List of embeddings (each is a list of 384 floats)
-        Returns None if model not loaded
+        List of embeddings (each is a list of 384 floats), one per non-blank text
+        Returns None if the encoder is unavailable
         Returns [] if no valid texts
-    
+
     Example:
         texts = ["article 1", "article 2", "article 3"]
         embeddings = get_embedding_batch(texts)
         # embeddings[0] corresponds to texts[0], etc.
     """
-    if bert_model is None:
+    if not SERVICE_URL and load_model() is None:
         logger.error("BERT model not loaded, cannot generate embeddings.")
         return None
-    
+
     if not texts:
         logger.warning("Empty text list provided")
         return []
-    
+
+    # Truncate to prevent token limit issues
+    cleaned_texts = [text[:MAX_CHARS] for text in texts if text and text.strip()]
+    if not cleaned_texts:
+        logger.warning("No valid texts after cleaning")
+        return []
+
     try:
-        # Clean and truncate texts
-        cleaned_texts = []
-        valid_indices = []
-        
-        for i, text in enumerate(texts):
-            if text and text.strip():
-                # Truncate to prevent token limit issues
-                cleaned = text[:2500]
-                cleaned_texts.append(cleaned)
-                valid_indices.append(i)
-        
-        if not cleaned_texts:
-            logger.warning("No valid texts after cleaning")
-            return []
-        
         logger.info(f"Batch encoding {len(cleaned_texts)} texts...")
-        
-        # THE MAGIC: Encode all texts in one batch operation
-        embeddings = bert_model.encode(
-            cleaned_texts,
-            batch_size=32,  # Process 32 at a time (optimal for most hardware)
-            #show_progress_bar=len(cleaned_texts) > 20,  # Show progress for large batches
-            show_progress_bar=False, 
-            convert_to_numpy=True,
-            normalize_embeddings=False  # Don't normalize unless needed
-        )
-        
+        embeddings = _encode(cleaned_texts, normalize)
+
         # Convert numpy arrays to lists for pgvector storage
-        embeddings_list = [emb.tolist() for emb in embeddings]
-        
+        embeddings_list = embeddings.tolist()
+
         logger.info(f"✅ Successfully generated {len(embeddings_list)} embeddings")
         return embeddings_list
-        
+
     except Exception as e:
         logger.error(f"❌ Failed to encode batch: {e}", exc_info=True)
         # Re-raise so calling task can handle retry logic
@@ -130,8 +196,8 @@ def get_embedding_batch(texts: list):
 # ---------------------------
 
 def is_model_loaded():
-    """Check if embedding model is loaded and ready"""
-    return bert_model is not None
+    """Check if the encoder is ready (the service is assumed to be)"""
+    return bool(SERVICE_URL) or load_model() is not None
 
 
 # ---------------------------
@@ -139,17 +205,57 @@ def is_model_loaded():
 # ---------------------------
 
 def get_model_info():
-    """Get information about the loaded model"""
-    if bert_model is None:
+    """Get information about the encoder in use"""
+    if SERVICE_URL:
+        return {
+            "loaded": True,
+            "model_name": MODEL_NAME,
+            "dimensions": DIMENSIONS,
+            "service_url": SERVICE_URL,
+        }
+
+    if load_model() is None:
         return {
             "loaded": False,
             "error": "Model not loaded"
         }
-    
+
     return {
         "loaded": True,
-        "model_name": "all-MiniLM-L6-v2",
-        "dimensions": 384,
+        "model_name": MODEL_NAME,
+        "dimensions": DIMENSIONS,
+        "backend": active_backend,
         "max_sequence_length": bert_model.max_seq_length,
         "device": str(bert_model.device)
-    }
\ No newline at end of file
+    }
+
+
+# ---------------------------
+# 6️⃣ Other models (re-embedding to a new EmbeddingModelVersion)
+# ---------------------------
+
+_named_models = {}
+
+
+def encode_with_model(model_name, texts, normalize=False):
+    """
+    Encode with any SentenceTransformer model: MODEL_NAME goes through the
+    usual path (service or in-process), others are loaded here once.
+    """
+    if model_name == MODEL_NAME:
+        return _encode(texts, normalize)
+
+    with _model_lock:
+        model = _named_models.get(model_name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = _named_models[model_name] = SentenceTransformer(model_name)
+            logger.info(f"✅ Embedding model {model_name} loaded for re-embedding.")
+
+    lengths = token_lengths(model.tokenizer, texts, max_length=model.max_seq_length)
+    rows = map_batched(
+        lambda batch: model.encode(batch, batch_size=len(batch), show_progress_bar=False, normalize_embeddings=normalize),
+        texts,
+        lengths,
+    )
+    return np.vstack(rows).astype(np.float32, copy=False)
@@ -0,0 +1,242 @@
+# apps/scraper/utils/host_guard.py
+"""
+Per-host protection for outbound scraper requests.
+
+- A token bucket per host spaces requests out (in-process, per worker).
+- A circuit breaker per host opens after SCRAPER_BREAKER_FAILURES
+  consecutive failures (timeouts, connection errors, 429/5xx). While open,
+  requests to that host fail immediately instead of waiting out a timeout.
+  Once the cooldown has passed, a single probe request is let through; it
+  closes the breaker on success or reopens it for twice as long on failure.
+
+Breaker state lives in Redis so every Celery worker sees the same open
+hosts. If Redis is unreachable the breaker keeps working on local state.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import redis
+import requests
+
+from apps.scraper.utils import http_client
+from apps.scraper.utils.concurrency import host_limiter, host_of
+from apps.scraper.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+HOST_RATE = float(os.getenv("SCRAPER_HOST_RATE", "5"))          # requests/sec per host, 0 disables
+HOST_BURST = float(os.getenv("SCRAPER_HOST_BURST", "10"))       # requests allowed back to back
+BREAKER_FAILURES = int(os.getenv("SCRAPER_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("SCRAPER_BREAKER_COOLDOWN", "120"))        # seconds open before probing
+BREAKER_MAX_COOLDOWN = float(os.getenv("SCRAPER_BREAKER_MAX_COOLDOWN", "3600"))
+PROBE_TTL = 60          # a probe that never reports back frees its slot after this
+REDIS_RETRY_AFTER = 30  # seconds on local state after a Redis error
+KEY_PREFIX = "scraper:breaker:"
+
+FAILURE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HostUnavailable(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose breaker is open."""
+
+
+# ---------------------------
+# Rate limiting
+# ---------------------------
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; returns how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1  # may go negative: later callers queue up behind us
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, host):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[host] = bucket
+        wait = bucket.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+# ---------------------------
+# Circuit breaker
+# ---------------------------
+
+class _LocalBreakerStore:
+    """Breaker state for this process only (fallback when Redis is down)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def load(self, host):
+        with self._lock:
+            state = self._state.get(host, {})
+            return state.get("failures", 0), state.get("opened_until", 0.0), state.get("opens", 0)
+
+    def add_failure(self, host):
+        with self._lock:
+            state = self._state.setdefault(host, {})
+            state["failures"] = state.get("failures", 0) + 1
+            return state["failures"]
+
+    def open(self, host, opened_until, opens):
+        with self._lock:
+            self._state[host] = {"failures": 0, "opened_until": opened_until, "opens": opens}
+
+    def claim_probe(self, host, ttl):
+        with self._lock:
+            state = self._state.setdefault(host, {})
+            now = time.time()
+            if state.get("probe_until", 0.0) > now:
+                return False
+            state["probe_until"] = now + ttl
+            return True
+
+    def reset(self, host):
+        with self._lock:
+            self._state.pop(host, None)
+
+
+class _RedisBreakerStore:
+    """Breaker state shared by every worker: one hash per host plus a probe lock."""
+
+    def __init__(self, ttl):
+        self.ttl = int(ttl)  # forget hosts nobody has touched for this long
+
+    def load(self, host):
+        state = get_redis().hgetall(KEY_PREFIX + host)
+        return int(state.get("failures", 0)), float(state.get("opened_until", 0)), int(state.get("opens", 0))
+
+    def add_failure(self, host):
+        pipe = get_redis().pipeline()
+        pipe.hincrby(KEY_PREFIX + host, "failures", 1)
+        pipe.expire(KEY_PREFIX + host, self.ttl)
+        return pipe.execute()[0]
+
+    def open(self, host, opened_until, opens):
+        pipe = get_redis().pipeline()
+        pipe.hset(KEY_PREFIX + host, mapping={"failures": 0, "opened_until": opened_until, "opens": opens})
+        pipe.expire(KEY_PREFIX + host, self.ttl)
+        pipe.delete(KEY_PREFIX + host + ":probe")
+        pipe.execute()
+
+    def claim_probe(self, host, ttl):
+        return bool(get_redis().set(KEY_PREFIX + host + ":probe", 1, nx=True, ex=int(ttl)))
+
+    def reset(self, host):
+        get_redis().delete(KEY_PREFIX + host, KEY_PREFIX + host + ":probe")
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._remote = _RedisBreakerStore(ttl=2 * max_cooldown)
+        self._local = _LocalBreakerStore()
+        self._remote_down_until = 0.0
+        # Hosts with breaker state, so successes on healthy hosts cost nothing
+        self._tracked = set()
+
+    def _call(self, method, *args):
+        if time.monotonic() >= self._remote_down_until:
+            try:
+                return getattr(self._remote, method)(*args)
+            except redis.RedisError as e:
+                logger.warning(f"Breaker state unavailable in Redis, using local state: {e}")
+                self._remote_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        return getattr(self._local, method)(*args)
+
+    def allow(self, host):
+        """False while host's breaker is open; True when closed or for the one probe."""
+        failures, opened_until, opens = self._call("load", host)
+        if not failures and not opens:
+            return True
+
+        self._tracked.add(host)
+        if not opens:
+            return True  # closed, some failures counted
+        if time.time() < opened_until:
+            return False
+        return self._call("claim_probe", host, PROBE_TTL)  # half-open
+
+    def record_success(self, host):
+        if host in self._tracked:
+            self._tracked.discard(host)
+            self._call("reset", host)
+
+    def record_failure(self, host):
+        self._tracked.add(host)
+        _, opened_until, opens = self._call("load", host)
+        if opens:
+            if time.time() < opened_until:
+                return  # a request sent before the breaker opened
+            self._open(host, opens + 1)  # the probe failed
+            return
+
+        if self._call("add_failure", host) >= self.threshold:
+            self._open(host, 1)
+
+    def _open(self, host, opens):
+        cooldown = min(self.cooldown * 2 ** (opens - 1), self.max_cooldown)
+        self._call("open", host, time.time() + cooldown, opens)
+        logger.warning(f"Circuit opened for {host}: skipping it for {cooldown:.0f}s")
+
+
+rate_limiter = HostRateLimiter()
+breaker = CircuitBreaker()
+
+
+def guarded_get(url, failure_statuses=FAILURE_STATUSES, **kwargs):
+    """
+    http_client.get behind every per-host guard: breaker, rate limit and
+    in-flight cap. Raises HostUnavailable, without touching the network,
+    while the host's breaker is open. Responses with a status in
+    FAILURE_STATUSES but not in failure_statuses (e.g. an API's quota 429)
+    count neither for nor against the host.
+    """
+    host = host_of(url)
+    if not breaker.allow(host):
+        raise HostUnavailable(f"circuit open for {host}")
+
+    rate_limiter.acquire(host)
+    try:
+        with host_limiter.slot(url):
+            response = http_client.get(url, **kwargs)
+    except requests.RequestException:  # timeouts, refused/reset connections
+        breaker.record_failure(host)
+        raise
+
+    if response.status_code in failure_statuses:
+        breaker.record_failure(host)
+    elif response.status_code not in FAILURE_STATUSES:
+        breaker.record_success(host)
+    return response
@@ -0,0 +1,190 @@
+# apps/scraper/utils/html_cache.py
+"""
+Content-addressed, compressed on-disk cache of fetched article HTML.
+
+Layout under HTML_CACHE_DIR:
+    blobs/ab/<sha256 of html>.zst   compressed page, shared by every URL serving it
+    refs/cd/<sha256 of url>         "<blob name>\\t<fetched at (unix time)>"
+
+Reads touch the blob's mtime, and once the blobs outgrow the size budget
+the least recently used ones are evicted, along with the refs left
+pointing at them.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from apps.scraper.config import DATA_DIR
+from apps.scraper.utils.host_guard import guarded_get
+from apps.scraper.utils.url_index import canonicalize_url
+
+try:
+    import zstandard
+except ImportError:  # zlib keeps the cache working, just less compact
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("HTML_CACHE_DIR", os.path.join(DATA_DIR, "html_cache"))
+CACHE_MAX_BYTES = int(os.getenv("HTML_CACHE_MAX_MB", "2048")) * 1024 * 1024
+CACHE_TTL = int(os.getenv("HTML_CACHE_TTL", "21600"))  # seconds a live fetch trusts the cache
+EVICT_TO = 0.9  # evict down to 90% of the budget so we don't evict on every write
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=6).compress(data), ".zst"
+    return zlib.compress(data, 6), ".zlib"
+
+
+def _decompress(data, blob_name):
+    if blob_name.endswith(".zst"):
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class HtmlCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size = None  # bytes of blobs on disk, computed lazily
+        self._lock = threading.Lock()
+
+    def _ref_path(self, url):
+        key = _sha256(canonicalize_url(url).encode("utf-8"))
+        return os.path.join(self.root, "refs", key[:2], key)
+
+    def _blob_path(self, blob_name):
+        return os.path.join(self.root, "blobs", blob_name[:2], blob_name)
+
+    def get(self, url, max_age=None):
+        """Cached HTML for url, or None. max_age (seconds) rejects older fetches."""
+        try:
+            with open(self._ref_path(url), "r", encoding="utf-8") as f:
+                blob_name, fetched_at = f.read().split("\t")
+            if max_age is not None and time.time() - float(fetched_at) > max_age:
+                return None
+
+            blob_path = self._blob_path(blob_name)
+            with open(blob_path, "rb") as f:
+                data = _decompress(f.read(), blob_name)
+            os.utime(blob_path)  # LRU: recently read blobs are evicted last
+            return data.decode("utf-8")
+        except (OSError, ValueError, zlib.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Unreadable HTML cache entry for {url}: {e}")
+            return None
+
+    def put(self, url, html):
+        data = html.encode("utf-8")
+        compressed, suffix = _compress(data)
+        blob_name = _sha256(data) + suffix
+        blob_path = self._blob_path(blob_name)
+
+        written = 0
+        if not os.path.exists(blob_path):
+            _write_atomic(blob_path, compressed)
+            written = len(compressed)
+        _write_atomic(self._ref_path(url), f"{blob_name}\t{time.time()}".encode("utf-8"))
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_size()
+            else:
+                self._size += written
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _blobs(self):
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, "blobs")):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _disk_size(self):
+        return sum(size for _, size, _ in self._blobs())
+
+    def _evict(self):
+        """Delete least recently used blobs until under EVICT_TO of the budget."""
+        blobs = sorted(self._blobs(), key=lambda blob: blob[2])
+        size = sum(blob[1] for blob in blobs)
+        target = self.max_bytes * EVICT_TO
+        removed = 0
+        for path, blob_size, _ in blobs:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= blob_size
+            removed += 1
+        self._size = size
+        stale = self._drop_stale_refs() if removed else 0
+        logger.info(f"HTML cache evicted {removed} pages ({stale} refs), {size / 1024 / 1024:.0f} MB left")
+
+    def _drop_stale_refs(self):
+        """Delete refs whose blob is gone; returns how many."""
+        dropped = 0
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, "refs")):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        blob_name = f.read().split("\t")[0]
+                    if os.path.exists(self._blob_path(blob_name)):
+                        continue
+                    os.remove(path)
+                    dropped += 1
+                except OSError:
+                    continue  # rewritten or removed meanwhile
+        return dropped
+
+
+html_cache = HtmlCache()
+
+
+def fetch_html(url, timeout, max_age=CACHE_TTL):
+    """
+    Read-through page download: returns the cached HTML when it is younger
+    than max_age, otherwise downloads it and stores it. HTTP errors raise.
+    """
+    html = html_cache.get(url, max_age=max_age)
+    if html is not None:
+        return html
+
+    response = guarded_get(url, timeout=timeout)
+    response.raise_for_status()
+
+    html = response.text
+    try:
+        html_cache.put(url, html)
+    except OSError as e:
+        logger.warning(f"Could not cache HTML for {url}: {e}")
+    return html
@@ -0,0 +1,88 @@
+# apps/scraper/utils/http_client.py
+"""
+Shared outbound HTTP client.
+
+Every outbound call in the project (RSS feeds, article pages, NewsAPI,
+the debate web search) goes through one requests.Session so TCP/TLS
+connections are kept alive and reused per host, with the same retries,
+timeouts and User-Agent everywhere.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from apps.scraper.config import MAX_WORKERS
+
+USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0")
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))        # seconds
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))  # 0.5s, 1s, 2s...
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "100"))            # hosts kept warm
+MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "10"))  # longest Retry-After we sleep for
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _PooledSession(requests.Session):
+    """requests.Session that applies DEFAULT_TIMEOUT when the caller gives none."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+class _CappedRetry(Retry):
+    """Retry that honours Retry-After only up to MAX_RETRY_AFTER seconds."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        # A server asking for an hour would otherwise hold the worker past its time_limit
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+def _build_session():
+    retry = _CappedRetry(
+        total=MAX_RETRIES,
+        # A read timeout already cost DEFAULT_TIMEOUT; retrying it would let
+        # one slow host hold a worker for (MAX_RETRIES + 1) x that
+        read=0,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),  # POSTs are not retried
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    # One pool per host; each pool holds as many sockets as we have workers
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+
+    session = _PooledSession()
+    session.headers.update({"User-Agent": USER_AGENT})
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide session, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_session().post(url, **kwargs)
@@ -0,0 +1,204 @@
+# apps/scraper/utils/onnx_encoder.py
+"""
+int8 ONNX Runtime backend for all-MiniLM-L6-v2 (EMBEDDING_BACKEND=onnx).
+
+The encoder is exported once to ONNX, dynamically quantized to int8 and
+checked against the fp32 SentenceTransformer: the export only counts as
+usable when, with both called the way the project calls them, the cosine
+between both vectors of every corpus text clears the thresholds below and
+their lengths agree. The result is written to parity.json next to the
+model and load_onnx_encoder() refuses a model that did not pass.
+
+Export (needs torch + onnx, i.e. a dev box, not every node):
+    python -m apps.scraper.utils.onnx_encoder [--out DIR] [--corpus FILE.jsonl]
+
+Running it afterwards only needs onnxruntime + tokenizers.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from apps.scraper.config import DATA_DIR
+from apps.scraper.utils.batching import MAX_BATCH, map_batched
+
+HF_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", os.path.join(DATA_DIR, "onnx", "all-MiniLM-L6-v2-int8"))
+MODEL_FILE = "model_int8.onnx"
+PARITY_FILE = "parity.json"
+MAX_SEQ_LENGTH = 256  # what SentenceTransformer uses for this model
+
+# Parity gate against the fp32 vectors
+MIN_MEAN_COSINE = 0.99
+MIN_COSINE = 0.97
+MAX_NORM_ERROR = 0.01  # relative; the pipeline ends in Normalize, so both are unit length
+
+DEFAULT_CORPUS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "feed_snippets.jsonl"
+)
+
+
+class OnnxEncoder:
+    """
+    Drop-in for the subset of SentenceTransformer.encode the project uses.
+    all-MiniLM-L6-v2's pipeline ends with a Normalize module, so vectors
+    always come out unit length, whatever normalize_embeddings says.
+    """
+
+    device = "cpu (onnxruntime int8)"
+    max_seq_length = MAX_SEQ_LENGTH
+
+    def __init__(self, model_dir=ONNX_DIR, threads=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.no_padding()  # batches are padded one by one
+        self.pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, encodings):
+        # Pad this batch only to its own longest sequence
+        width = max(len(e.ids) for e in encodings)
+        inputs = {
+            "input_ids": np.full((len(encodings), width), self.pad_id, dtype=np.int64),
+            "attention_mask": np.zeros((len(encodings), width), dtype=np.int64),
+            "token_type_ids": np.zeros((len(encodings), width), dtype=np.int64),
+        }
+        for row, e in enumerate(encodings):
+            inputs["input_ids"][row, :len(e.ids)] = e.ids
+            inputs["attention_mask"][row, :len(e.ids)] = e.attention_mask
+            inputs["token_type_ids"][row, :len(e.ids)] = e.type_ids
+        hidden = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+
+        # Mean pooling over real tokens, like SentenceTransformer
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, texts, batch_size=MAX_BATCH, show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=False):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
+
+        # Tokenize once, then run length-bucketed batches (results in input order)
+        encodings = self.tokenizer.encode_batch(texts)
+        rows = map_batched(self._encode_batch, encodings, [len(e.ids) for e in encodings], max_batch=batch_size)
+        vectors = np.vstack(rows).astype(np.float32, copy=False)
+
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+def load_onnx_encoder(model_dir=ONNX_DIR):
+    """The exported encoder; raises unless its parity check passed."""
+    try:
+        with open(os.path.join(model_dir, PARITY_FILE), "r", encoding="utf-8") as f:
+            parity = json.load(f)
+    except FileNotFoundError:
+        raise RuntimeError(f"No exported ONNX encoder in {model_dir}: run python -m apps.scraper.utils.onnx_encoder")
+    if not parity.get("passed"):
+        raise RuntimeError(f"ONNX encoder in {model_dir} failed its parity check: {parity}")
+    return OnnxEncoder(model_dir)
+
+
+def export_quantized(out_dir=ONNX_DIR, model_name=HF_MODEL_NAME):
+    """Export the encoder to ONNX and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dummy = tokenizer(["a short example", "and a slightly longer example text"], padding=True, return_tensors="pt")
+    fp32_path = os.path.join(out_dir, "model_fp32.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in names),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]},
+            opset_version=14,
+        )
+
+    quantize_dynamic(fp32_path, os.path.join(out_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    tokenizer.save_pretrained(out_dir)  # writes tokenizer.json
+
+
+def compare_vectors(reference, candidate):
+    """Parity report of candidate against reference, row by row: direction and length."""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    reference_norms = np.linalg.norm(reference, axis=1)
+    candidate_norms = np.linalg.norm(candidate, axis=1)
+    cosines = (reference * candidate).sum(axis=1) / np.maximum(reference_norms * candidate_norms, 1e-12)
+    norm_errors = np.abs(candidate_norms - reference_norms) / np.maximum(reference_norms, 1e-12)
+    return {
+        "texts": len(reference),
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "max_norm_error": float(norm_errors.max()),
+        "passed": bool(
+            cosines.mean() >= MIN_MEAN_COSINE and cosines.min() >= MIN_COSINE and norm_errors.max() <= MAX_NORM_ERROR
+        ),
+    }
+
+
+def check_parity(encoder, texts, reference_encoder=None):
+    """
+    Compare encoder with the fp32 model over texts, both on their default
+    encode() path (what get_embedding uses); returns the parity report.
+    """
+    if reference_encoder is None:
+        from sentence_transformers import SentenceTransformer
+        reference_encoder = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+
+    return compare_vectors(reference_encoder.encode(texts, convert_to_numpy=True), encoder.encode(texts))
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=ONNX_DIR)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="jsonl of {\"text\": ...} used for the parity gate")
+    args = parser.parse_args()
+
+    print(f"Exporting {HF_MODEL_NAME} to {args.out} ...")
+    export_quantized(args.out)
+
+    report = check_parity(OnnxEncoder(args.out), load_corpus(args.corpus))
+    with open(os.path.join(args.out, PARITY_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    status = "✅ passed" if report["passed"] else "❌ FAILED"
+    print(
+        f"Parity {status}: mean cosine {report['mean_cosine']:.4f} (>= {MIN_MEAN_COSINE}), "
+        f"min {report['min_cosine']:.4f} (>= {MIN_COSINE}), length error {report['max_norm_error']:.4f} "
+        f"(<= {MAX_NORM_ERROR}) over {report['texts']} texts"
+    )
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
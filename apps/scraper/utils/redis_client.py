@@ -0,0 +1,63 @@
+# apps/scraper/utils/redis_client.py
+"""
+Process-wide Redis connection for state shared between Celery workers
+(the Celery broker's Redis unless REDIS_URL points elsewhere).
+"""
+
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL") or os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
+# Short timeouts: callers fall back to local state rather than wait on Redis
+SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    """Shared client (thread-safe, pooled), created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    REDIS_URL,
+                    socket_timeout=SOCKET_TIMEOUT,
+                    socket_connect_timeout=SOCKET_TIMEOUT,
+                    decode_responses=True,
+                )
+    return _client
+
+
+@contextmanager
+def redis_lock(key, ttl):
+    """
+    Best-effort cross-worker lock: yields True if this caller holds key for
+    up to ttl seconds, False if someone else does. When Redis is unreachable
+    it yields True - running twice is better than not running at all.
+    """
+    token = uuid.uuid4().hex
+    try:
+        acquired = bool(get_redis().set(key, token, nx=True, ex=int(ttl)))
+    except redis.RedisError as e:
+        logger.warning(f"Lock {key} unavailable, continuing without it: {e}")
+        yield True
+        return
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                if get_redis().get(key) == token:  # don't free a lock that expired and was retaken
+                    get_redis().delete(key)
+            except redis.RedisError:
+                pass  # expires on its own
@@ -0,0 +1,147 @@
+import hashlib
+import re
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+
+SHINGLE_WORDS = 4    # words per shingle
+MAX_DISTANCE = 3     # Hamming distance at which two bodies count as the same story
+BANDS = 4            # 64 bits / 4 bands: distance <= 3 always leaves one band identical
+BAND_BITS = 64 // BANDS
+WINDOW_DAYS = 7      # how far back the index looks for the original of a story
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _to_signed(value):
+    # Postgres bigint is signed
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value):
+    return value & ((1 << 64) - 1)
+
+
+def simhash(text):
+    """64-bit SimHash (as a signed int) over word shingles of a cleaned body."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return None
+
+    if len(words) < SHINGLE_WORDS:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(shingles), 64)
+    # A bit is set when more than half of the shingles set it
+    fingerprint = np.packbits(bits.sum(axis=0) * 2 > len(shingles))
+    return _to_signed(int.from_bytes(fingerprint.tobytes(), "big"))
+
+
+def hamming(a, b):
+    return bin(_to_unsigned(a) ^ _to_unsigned(b)).count("1")
+
+
+def _bands(value):
+    value = _to_unsigned(value)
+    mask = (1 << BAND_BITS) - 1
+    return [(band, (value >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+
+def _url_key(url):
+    return hashlib.blake2b((url or "").encode("utf-8"), digest_size=8).digest()
+
+
+class SimHashIndex:
+    """
+    Banded LSH over article SimHashes for near-duplicate lookup.
+
+    Each entry maps a fingerprint to its cluster root: an Article id for
+    stored rows, or a URL for articles of the current run not saved yet.
+    refresh() pulls rows added since its previous call from the simhash
+    column, so the index is rebuilt after a restart from Postgres, and
+    drops entries that have aged out of the window.
+    """
+
+    def __init__(self, window_days=WINDOW_DAYS):
+        self.window_days = window_days
+        self._tables = {}
+        self._last_id = 0
+        self._pruned_at = time.time()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        from django.utils import timezone
+        from apps.scraper.models import Article
+
+        self.prune()
+        rows = (
+            Article.objects.filter(
+                id__gt=self._last_id,
+                simhash__isnull=False,
+                scraped_at__gte=timezone.now() - timedelta(days=self.window_days),
+            )
+            .order_by("id")
+            .values_list("id", "url", "simhash", "duplicate_of_id", "scraped_at")
+            .iterator(chunk_size=5000)
+        )
+        for article_id, url, fingerprint, duplicate_of_id, scraped_at in rows:
+            self.add(duplicate_of_id or article_id, fingerprint, url, scraped_at.timestamp())
+            self._last_id = article_id
+        return self
+
+    def prune(self, min_interval=3600):
+        """Drop entries older than the window (at most once per min_interval seconds)."""
+        now = time.time()
+        if now - self._pruned_at < min_interval:
+            return
+        self._remove(lambda entry: entry[3] < now - self.window_days * 86400)
+        self._pruned_at = now
+
+    def drop_pending(self):
+        """Forget the URL roots added during a run; once stored they come back by id on refresh()."""
+        self._remove(lambda entry: not isinstance(entry[0], int))
+
+    def _remove(self, predicate):
+        with self._lock:
+            for band, entries in list(self._tables.items()):
+                kept = [entry for entry in entries if not predicate(entry)]
+                if kept:
+                    self._tables[band] = kept
+                else:
+                    del self._tables[band]
+
+    def find(self, fingerprint, url=None):
+        """Cluster root of the closest stored body within MAX_DISTANCE, or None."""
+        own_key = _url_key(url)
+        best = None
+        with self._lock:
+            for band in _bands(fingerprint):
+                for root, candidate, url_key, _ in self._tables.get(band, ()):
+                    if url_key == own_key:
+                        continue
+                    distance = hamming(fingerprint, candidate)
+                    if distance <= MAX_DISTANCE and (best is None or distance < best[0]):
+                        best = (distance, root)
+        return best[1] if best else None
+
+    def add(self, root, fingerprint, url=None, added_at=None):
+        entry = (root, fingerprint, _url_key(url), added_at or time.time())
+        with self._lock:
+            for band in _bands(fingerprint):
+                self._tables.setdefault(band, []).append(entry)
+
+
+_index = None
+
+
+def get_simhash_index():
+    """Process-wide index, brought up to date with the database on every call."""
+    global _index
+    if _index is None:
+        _index = SimHashIndex()
+    return _index.refresh()
@@ -0,0 +1,125 @@
+import hashlib
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "cmpid", "ocid", "icid", "smid", "ito",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "at_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Normalize an article URL so the same page always maps to one string:
+    lowercase scheme/host, no default port, no fragment, no tracking
+    parameters, remaining query parameters sorted.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+
+    query = urlencode(sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ))
+
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def _url_key(canonical_url):
+    # 8-byte digest keeps the snapshot small; collisions are negligible at our scale
+    return int.from_bytes(hashlib.blake2b(canonical_url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SeenUrlIndex:
+    """
+    In-memory snapshot of every canonical article URL stored in Postgres.
+
+    refresh() only reads rows added since the previous call, so keeping one
+    index per worker process makes each scrape run's lookup almost free.
+    """
+
+    def __init__(self):
+        self._keys = set()
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        from apps.scraper.models import Article
+
+        rows = (
+            Article.objects.filter(id__gt=self._last_id)
+            .order_by("id")
+            .values_list("id", "url")
+            .iterator(chunk_size=5000)
+        )
+        with self._lock:
+            for article_id, url in rows:
+                self._keys.add(_url_key(canonicalize_url(url)))
+                self._last_id = article_id
+        return self
+
+    def __contains__(self, url):
+        return _url_key(canonicalize_url(url)) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class RunUrlFilter:
+    """
+    Claims URLs for the current scrape run on top of the stored snapshot.
+
+    Rows written by the run reach the SeenUrlIndex on its next refresh(),
+    so a URL whose fetch failed is retried on the following run.
+    """
+
+    def __init__(self, index=None):
+        self.index = index
+        self._claimed = set()
+
+    def claim(self, url, refetch=False):
+        """
+        True if url is new to both the database and this run. With refetch,
+        a URL already in the database is claimed too (once per run).
+        """
+        if not refetch and self.index is not None and url in self.index:
+            return False
+        key = _url_key(canonicalize_url(url))
+        if key in self._claimed:
+            return False
+        self._claimed.add(key)
+        return True
+
+
+_seen_urls = None
+
+
+def get_seen_url_index():
+    """Process-wide index, brought up to date with the database on every call."""
+    global _seen_urls
+    if _seen_urls is None:
+        _seen_urls = SeenUrlIndex()
+    return _seen_urls.refresh()
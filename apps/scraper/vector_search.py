@@ -0,0 +1,175 @@
+import os
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.contrib.postgres.indexes import OpClass
+from django.db.models import Func
+from django.db.models.functions import Cast
+from pgvector import HalfVector
+from pgvector.django import BitField, CosineDistance, HalfVectorField, HammingDistance, HnswIndex
+
+from .models import ArticleEmbedding
+
+# Query-time ANN knobs: higher = better recall, slower queries.
+# hnsw.ef_search is raised to k when smaller, or fewer than k rows come back.
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "40"))
+IVFFLAT_PROBES = int(os.getenv("VECTOR_IVFFLAT_PROBES", "10"))
+
+# Which index answers similarity queries:
+#   fp32    - full vectors (articleembedding_hnsw_cos)
+#   halfvec - fp16 copy of the vectors (articleembedding_hnsw_half)
+#   binary  - 1 bit per dimension, Hamming distance (articleembedding_hnsw_bit)
+# halfvec/binary fetch k * VECTOR_RERANK_FACTOR candidates from their index and
+# re-rank them by exact fp32 cosine distance. Their indexes only exist once
+# create_compact_index(mode) has run (without one, a compact mode is a
+# sequential scan).
+SEARCH_MODE = os.getenv("VECTOR_SEARCH_MODE", "fp32")
+SEARCH_MODES = ("fp32", "halfvec", "binary")
+RERANK_FACTOR = int(os.getenv("VECTOR_RERANK_FACTOR", "4"))
+
+# Expressions of the compact indexes below; queries must use the very same, or the planner won't use them
+DIMENSIONS = 384
+HALFVEC = Cast("embedding", HalfVectorField(dimensions=DIMENSIONS))
+BINARY = Cast(Func("embedding", function="binary_quantize", output_field=BitField()), BitField(length=DIMENSIONS))
+
+
+@contextmanager
+def ann_settings(ef_search=None, probes=None, exact=False):
+    """
+    Transaction whose similarity queries use the given ANN settings
+    (SET LOCAL, so they end with the transaction). exact=True turns index
+    scans off: a sequential scan returning the true nearest neighbours.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search or HNSW_EF_SEARCH)}")
+        cursor.execute(f"SET LOCAL ivfflat.probes = {int(probes or IVFFLAT_PROBES)}")
+        if exact:
+            cursor.execute("SET LOCAL enable_indexscan = off")
+        yield
+
+
+def binary_quantize(vector):
+    """Bit string of a vector, as pgvector's binary_quantize() (1 where > 0)."""
+    return "".join("1" if value > 0 else "0" for value in vector)
+
+
+def nearest_embeddings(query_embedding, k=10, ef_search=None, probes=None, exact=False, mode=None, rerank=None):
+    """
+    ArticleEmbedding rows closest to query_embedding by cosine distance,
+    with .article loaded and .distance annotated, served by the index of
+    the given mode (SEARCH_MODE by default).
+    """
+    mode = mode or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown vector search mode {mode!r}, expected one of {SEARCH_MODES}")
+
+    exact_distance = CosineDistance("embedding", query_embedding)
+    rows = ArticleEmbedding.objects.select_related("article").defer("article__search_vector")
+    if mode == "fp32" or exact:
+        candidates = k
+        rows = rows.annotate(distance=exact_distance).order_by("distance")
+    else:
+        candidates = k * max(1, rerank or RERANK_FACTOR)
+        if mode == "halfvec":
+            approximate = CosineDistance(HALFVEC, HalfVector(query_embedding))
+        else:
+            approximate = HammingDistance(BINARY, binary_quantize(query_embedding))
+        rows = rows.annotate(approximate=approximate, distance=exact_distance).order_by("approximate")
+
+    ef_search = max(ef_search or HNSW_EF_SEARCH, candidates)
+    with ann_settings(ef_search, probes, exact):
+        rows = list(rows[:candidates])
+
+    # Exact re-rank of the compact candidates (already ordered for fp32)
+    rows.sort(key=lambda row: row.distance)
+    return rows[:k]
+
+
+# ---------------------------------------------------------------------------
+# IVFFlat option
+# ---------------------------------------------------------------------------
+# HNSW (migration 0011) is the default index. IVFFlat builds faster and is
+# smaller but its lists come from k-means over the rows present at build
+# time, so it is built on demand once the table is populated, not in a
+# migration. The planner picks whichever of both gives the cheaper plan.
+
+IVFFLAT_INDEX = "articleembedding_ivfflat_cos"
+
+
+def index_name(name, model=ArticleEmbedding):
+    """
+    Name of an on-demand index when built on model's table: the flip builds
+    them on ArticleEmbeddingStaging first (articleembeddingstaging_...).
+    """
+    return name.replace(ArticleEmbedding._meta.model_name, model._meta.model_name, 1)
+
+
+def create_ivfflat_index(lists=None, model=ArticleEmbedding):
+    """Build the IVFFlat index (lists defaults to rows / 1000, sqrt(rows) past 1M)."""
+    if lists is None:
+        rows = model.objects.count()
+        lists = rows // 1000 if rows <= 1_000_000 else int(rows ** 0.5)
+    lists = max(1, int(lists))
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(IVFFLAT_INDEX, model)} ON {table} "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+        )
+    return lists
+
+
+def drop_ivfflat_index(model=ArticleEmbedding):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(IVFFLAT_INDEX, model)}")
+
+
+# ---------------------------------------------------------------------------
+# Compact indexes
+# ---------------------------------------------------------------------------
+# Expression indexes over the same column, fp16 (half the size of the fp32
+# index) and 1 bit per dimension (1/32). Only worth their build time and
+# memory where the matching SEARCH_MODE is in use, so like IVFFlat they are
+# built on demand rather than by a migration.
+
+COMPACT_INDEXES = {
+    "halfvec": HnswIndex(
+        OpClass(HALFVEC, name="halfvec_cosine_ops"), name="articleembedding_hnsw_half", m=16, ef_construction=64
+    ),
+    "binary": HnswIndex(
+        OpClass(BINARY, name="bit_hamming_ops"), name="articleembedding_hnsw_bit", m=16, ef_construction=64
+    ),
+}
+
+
+def index_exists(name, model=ArticleEmbedding):
+    """Whether model's table (the embeddings table by default) has an index called name."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        return name in connection.introspection.get_constraints(cursor, table)
+
+
+def _compact_index(mode, model):
+    index = COMPACT_INDEXES[mode]
+    if model is ArticleEmbedding:
+        return index
+    index = index.clone()
+    index.name = index_name(index.name, model)
+    return index
+
+
+def compact_index_exists(mode, model=ArticleEmbedding):
+    return index_exists(_compact_index(mode, model).name, model)
+
+
+def create_compact_index(mode, model=ArticleEmbedding):
+    """Build the index serving a halfvec/binary SEARCH_MODE (no-op if it exists)."""
+    if compact_index_exists(mode, model):
+        return
+    with connection.schema_editor(atomic=False) as editor:
+        editor.add_index(model, _compact_index(mode, model), concurrently=True)
+
+
+def drop_compact_index(mode, model=ArticleEmbedding):
+    with connection.schema_editor(atomic=False) as editor:
+        editor.remove_index(model, _compact_index(mode, model), concurrently=True)
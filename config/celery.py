@@ -10,17 +10,26 @@ app.autodiscover_tasks()
 
 # Schedule the scraper task
 app.conf.beat_schedule = {
-    # Scrape every 15 minutes
-    "scrape-news-every-15-mins": {
+    # Poll every 5 minutes; each source is only fetched when its adaptive
+    # schedule (FeedState.next_poll_at) says it is due
+    "scrape-due-feeds-every-5-mins": {
         "task": "apps.scraper.tasks.scrape_news_fast",
-        "schedule": crontab(minute="*/15"),
+        "schedule": crontab(minute="*/5"),
     },
 
-    # Embedding task runs every 20 mins, slightly after scraping
+    # Safety-net sweep: ingestion already queues new articles for
+    # embed_pending_articles, this catches whatever that queue missed
     "generate-embeddings-every-20-mins": {
         "task": "apps.scraper.tasks.generate_embeddings",
         "schedule": crontab(minute="*/20"),
     },
+
+    # Continues an embedding model upgrade (start_reembedding), throttled;
+    # a no-op unless an EmbeddingModelVersion is being built
+    "reembed-articles-every-10-mins": {
+        "task": "apps.scraper.tasks.reembed_articles",
+        "schedule": crontab(minute="*/10"),
+    },
 }
 
 app.conf.timezone = 'UTC'